@@ -2,6 +2,8 @@
 ASGI config for ConfigView project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests are handled by Django; websocket connections are routed to the
+scan session application in ``api.websockets``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,4 +15,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ConfigView.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up, as it loads models.
+from api.websockets import ScanSession
+
+scan_session_application = ScanSession()
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await scan_session_application(scope, receive, send)
+
+    return await django_application(scope, receive, send)
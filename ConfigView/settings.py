@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
 import sys
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -53,11 +54,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.SQLInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.RequestProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -93,6 +96,83 @@ DATABASES = {
     }
 }
 
+# Pragmas applied to every new SQLite connection, see `api.database`.
+SQLITE_PRAGMAS = {}
+
+# `ims_database_profile=production` tunes SQLite for concurrent use: WAL
+# journaling so reads don't block behind writes, a busy timeout instead of
+# immediate "database is locked" errors, persistent connections, and a
+# separate read-only connection for the reads of safe API requests.
+
+DATABASE_PROFILE = os.environ.get('ims_database_profile', 'development')
+
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.environ.get('ims_conn_max_age', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        # Seconds to wait for a write lock, Python's sqlite3 busy timeout.
+        'OPTIONS': {'timeout': 20},
+    })
+    DATABASES['readonly'] = {
+        **DATABASES['default'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['api.database.ReadOnlyRouter']
+
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 20000,
+        'mmap_size': 256 * 1024 * 1024,
+        # Negative sizes are in KiB.
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    }
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# File based so that every worker process shares cached API responses.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('ims_cache_dir', os.path.join(tempfile.gettempdir(), 'ims_cache')),
+        'KEY_PREFIX': 'ims',
+    }
+}
+
+# Per-request SQL instrumentation, see `api.middleware.SQLInstrumentationMiddleware`.
+# Reports query counts and times in a Server-Timing header and logs slow
+# requests and repeated (N+1) queries.
+
+SQL_INSTRUMENTATION = {
+    'ENABLED': os.environ.get('ims_sql_instrumentation', str(DEBUG)).lower() in ('1', 'true'),
+    'SLOW_REQUEST_MS': int(os.environ.get('ims_slow_request_ms', 500)),
+    'REPEATED_QUERY_THRESHOLD': int(os.environ.get('ims_repeated_query_threshold', 10)),
+    'TOP_QUERIES': 5,
+}
+
+# Staff users can profile a request with `?profile=1`, see `api.profiler`.
+
+REQUEST_PROFILER_ENABLED = os.environ.get('ims_request_profiler', 'true').lower() in ('1', 'true')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.middleware': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # Custom User Model
 # https://docs.djangoproject.com/en/4.2/topics/auth/customizing/#auth-custom-user
 
@@ -162,7 +242,7 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
     'PAGE_SIZE': 2000,
 }
 
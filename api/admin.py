@@ -1,3 +1,69 @@
 from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import RequestProfile
 
-# Register your models here.
+class RequestProfileAdmin(admin.ModelAdmin):
+    date_hierarchy = 'time'
+    empty_value_display = "-None-"
+
+    list_display = (
+        "id", "method", "path", "status_code", "duration", "query_count", "query_duration", "user", "time", "downloads",
+    )
+    list_filter = ("method", "status_code")
+    search_fields = ("path",)
+    fields = [
+        ("method", "path"),
+        ("status_code", "user", "time"),
+        ("duration", "query_count", "query_duration"),
+        "downloads",
+        "report_text",
+    ]
+    readonly_fields = [
+        "method", "path", "status_code", "user", "time", "duration", "query_count", "query_duration", "downloads", "report_text",
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:object_id>/download/<str:kind>/",
+                self.admin_site.admin_view(self.download_view),
+                name="api_requestprofile_download",
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, object_id, kind):
+        if kind not in ("profile", "report") or not self.has_view_permission(request):
+            raise Http404()
+
+        profile = get_object_or_404(RequestProfile, id=object_id)
+        field = getattr(profile, kind)
+        if not field:
+            raise Http404()
+        return FileResponse(field.open("rb"), as_attachment=True, filename=field.name.rsplit("/", 1)[-1])
+
+    @admin.display(description="Downloads")
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">.prof</a> / <a href="{}">report</a>',
+            reverse("admin:api_requestprofile_download", args=[obj.id, "profile"]),
+            reverse("admin:api_requestprofile_download", args=[obj.id, "report"]),
+        )
+
+    @admin.display(description="Report")
+    def report_text(self, obj):
+        try:
+            with obj.report.open("r") as report:
+                return format_html("<pre>{}</pre>", report.read())
+        except (FileNotFoundError, ValueError):
+            return "-None-"
+
+admin.site.register(RequestProfile, RequestProfileAdmin)
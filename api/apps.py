@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import cache, database, profiler
+
+        # Any write through the ORM invalidates cached API responses of its model.
+        post_save.connect(cache.invalidate_on_save, dispatch_uid='api_cache_post_save')
+        post_delete.connect(cache.invalidate_on_delete, dispatch_uid='api_cache_post_delete')
+        m2m_changed.connect(cache.invalidate_on_m2m_change, dispatch_uid='api_cache_m2m_changed')
+
+        # Request profiles take their files with them.
+        post_delete.connect(profiler.delete_profile_files, sender='api.RequestProfile', dispatch_uid='api_profile_post_delete')
+
+        # SQLite pragmas of the database profile.
+        connection_created.connect(database.configure_connection, dispatch_uid='api_database_connection_created')
@@ -0,0 +1,70 @@
+import datetime
+from itertools import accumulate
+from django.db.models import Count
+from assets.models import Asset, ReservationItem
+from .exceptions import InvalidData
+
+# Longest date window a single availability request may cover.
+MAX_AVAILABILITY_DAYS = 731
+
+def get_model_availability(start_date, end_date, model_ids=None, exclude_reservation=None):
+    """
+    Available quantity of each model on every day from `start_date` to
+    `end_date` (inclusive), as stock minus the quantities held by
+    reservations overlapping that day.
+
+    Stock counts assets in working condition. Holds are swept once over the
+    window: each one adds its quantity to a per-model difference array on
+    its first day in the window and removes it after its last, and a prefix
+    sum turns those into daily totals. That's two queries and
+    O(holds + models * days) work however many days or holds there are.
+    """
+    if end_date < start_date:
+        raise InvalidData("The end date must not be before the start date.")
+
+    days = (end_date - start_date).days + 1
+    if days > MAX_AVAILABILITY_DAYS:
+        raise InvalidData(f"Availability can be requested for at most {MAX_AVAILABILITY_DAYS} days at once.")
+
+    assets = Asset.objects.filter(condition=0)
+    holds = ReservationItem.objects.filter(
+        reservation__start_date__lte=end_date,
+        reservation__end_date__gte=start_date,
+    )
+    if model_ids is not None:
+        assets = assets.filter(model_id__in=model_ids)
+        holds = holds.filter(model_id__in=model_ids)
+    if exclude_reservation is not None:
+        holds = holds.exclude(reservation_id=exclude_reservation)
+
+    stock = dict(assets.order_by().values_list('model_id').annotate(count=Count('id')))
+
+    changes = {}
+    for model_id, quantity, hold_start, hold_end in holds.values_list(
+        'model_id', 'quantity', 'reservation__start_date', 'reservation__end_date'
+    ):
+        model_changes = changes.setdefault(model_id, [0] * (days + 1))
+        model_changes[(max(hold_start, start_date) - start_date).days] += quantity
+        model_changes[(min(hold_end, end_date) - start_date).days + 1] -= quantity
+
+    results = {}
+    for model_id in sorted(set(model_ids if model_ids is not None else [*stock, *changes])):
+        model_stock = stock.get(model_id, 0)
+        reserved = list(accumulate(changes.get(model_id, [0] * (days + 1))))[:days]
+        available = [model_stock - quantity for quantity in reserved]
+
+        results[model_id] = {
+            'model': model_id,
+            'stock': model_stock,
+            'reserved': reserved,
+            'available': available,
+            'min_available': min(available),
+        }
+
+    return results
+
+def parse_availability_date(value, name):
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidData(f"'{name}' must be a date formatted as YYYY-MM-DD.")
@@ -0,0 +1,170 @@
+"""
+Shared machinery of the benchmark tests in each app's `tests.py`.
+
+Benchmarks run against a fixed, seeded dataset and measure the SQL queries,
+wall time and peak Python memory of a callable. Each measurement is
+checked against its entry in `benchmark_budgets.json`:
+
+    {"asset-list": {"queries": 6, "seconds": 1.5, "memory_kb": 20000}, ...}
+
+Query budgets are exact and always enforced. Time and memory budgets sit a
+small fixed margin (`TIME_MARGIN`, `MEMORY_MARGIN`) over the slowest of a
+few runs on the reference machine, too close for run-to-run noise on a
+shared machine, so they are only enforced when `ims_benchmark_resources` is
+set. `ims_benchmark_time_factor` then scales the time budgets on machines
+slower than the reference one.
+
+When `ims_benchmark_report` names a file, the budget each measurement calls
+for is written there in the same format, keeping the larger of any entry
+already in the file. Run the suite a few times into one report and copy it
+over `benchmark_budgets.json` to refresh the budgets.
+"""
+import datetime
+import gc
+import json
+import os
+import time
+import tracemalloc
+from io import StringIO
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from .cache import get_response_cache
+
+BUDGET_FILE = settings.BASE_DIR / 'benchmark_budgets.json'
+
+# Arguments of `loadtestdata` building the benchmark dataset. The date
+# anchor keeps the dataset, and so the budgets, the same from day to day.
+BENCHMARK_DATASET = {
+    'assets': 2000,
+    'shipments': 60,
+    'reservations': 300,
+    'locations': 20,
+    'seed': 1,
+    'today': datetime.date(2026, 1, 1),
+}
+
+# Headroom of time and memory budgets over a measurement: (factor, constant).
+TIME_MARGIN = (1.25, 0.02)
+MEMORY_MARGIN = (1.1, 32)
+
+def budget_for(measurement):
+    return {
+        'queries': measurement['queries'],
+        'seconds': round(measurement['seconds'] * TIME_MARGIN[0] + TIME_MARGIN[1], 3),
+        'memory_kb': int(measurement['memory_kb'] * MEMORY_MARGIN[0] + MEMORY_MARGIN[1]),
+    }
+
+def load_budgets():
+    with open(BUDGET_FILE) as budget_file:
+        return json.load(budget_file)
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmarks'}})
+class BenchmarkTestCase(TestCase):
+    """
+    Seeds the benchmark dataset once per class and logs the client in as a
+    superuser.
+    """
+    measurements = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            email='benchmark@example.com', password='benchmark', first_name='Bench', last_name='Mark'
+        )
+        call_command('loadtestdata', stdout=StringIO(), **BENCHMARK_DATASET)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+
+        report_file = os.environ.get('ims_benchmark_report')
+        if report_file and cls.measurements:
+            report = {}
+            if os.path.exists(report_file):
+                with open(report_file) as existing:
+                    report = json.load(existing)
+
+            for name, measurement in cls.measurements.items():
+                budget = budget_for(measurement)
+                previous = report.get(name, budget)
+                report[name] = {metric: max(limit, previous[metric]) for metric, limit in budget.items()}
+            with open(report_file, 'w') as output:
+                json.dump(report, output, indent=4, sort_keys=True)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def reset_caches(self):
+        get_response_cache().clear()
+        ContentType.objects.clear_cache()
+
+    def benchmark(self, name, run, reset=None):
+        """
+        Measure `run()` and fail the test if it exceeds the budget named
+        `name`. Returns the result of `run()`.
+
+        Queries and wall time come from a first pass that is rolled back.
+        Peak memory comes from a second pass, traced by `tracemalloc`, whose
+        overhead would otherwise inflate the time. Its changes are kept.
+        `run` must therefore load whatever it changes itself. `reset` is
+        called before each pass; by default it clears the response and
+        content type caches.
+        """
+        reset = reset or self.reset_caches
+
+        # Collect the garbage of earlier tests up front, so neither pass pays for it.
+        reset()
+        gc.collect()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                run()
+                seconds = time.perf_counter() - started
+            query_count = len(queries)
+            transaction.set_rollback(True)
+
+        reset()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        measurement = {
+            'queries': query_count,
+            'seconds': round(seconds, 3),
+            'memory_kb': peak // 1024,
+        }
+        type(self).measurements[name] = measurement
+
+        budget = load_budgets().get(name)
+        if budget is None:
+            self.fail(f"No budget for benchmark '{name}' in {BUDGET_FILE.name}, measured {measurement}.")
+
+        limits = [('queries', budget['queries'])]
+        if os.environ.get('ims_benchmark_resources'):
+            time_factor = float(os.environ.get('ims_benchmark_time_factor', 1))
+            limits += [('seconds', budget['seconds'] * time_factor), ('memory_kb', budget['memory_kb'])]
+
+        exceeded = [f"{metric} {measurement[metric]} > {limit}" for metric, limit in limits if measurement[metric] > limit]
+        if exceeded:
+            self.fail(f"Benchmark '{name}' exceeded its budget: {', '.join(exceeded)}.")
+
+        return result
+
+    def get(self, path, **extra):
+        response = self.client.get(path, **extra)
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        return response
+
+    def post(self, path, data=None, status_code=200):
+        response = self.client.post(path, data, content_type='application/json')
+        self.assertEqual(response.status_code, status_code, response.content[:500])
+        return response
@@ -0,0 +1,62 @@
+import hashlib
+import uuid
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import urlencode
+
+RESPONSE_CACHE_ALIAS = 'default'
+
+def get_response_cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+def generation_key(model):
+    return f"api:generation:{model._meta.label_lower}"
+
+def get_generations(models):
+    """
+    Current generation token of each model, with a single cache round trip.
+
+    Tokens are random rather than incremented: the cache backends used here
+    don't increment atomically across processes, but two writers replacing
+    the token always leave a value no cached response was stored under.
+    """
+    keys = {generation_key(model): model for model in models}
+    generations = get_response_cache().get_many(keys)
+
+    missing = {key: uuid.uuid4().hex for key in keys if key not in generations}
+    if missing:
+        get_response_cache().set_many(missing, timeout=None)
+        generations.update(missing)
+
+    return [generations[key] for key in keys]
+
+def bump_generation(*models):
+    """
+    Invalidate every cached response built from rows of `models`, once the
+    current transaction commits.
+    """
+    tokens = {generation_key(model): uuid.uuid4().hex for model in models}
+    transaction.on_commit(lambda: get_response_cache().set_many(tokens, timeout=None))
+
+def response_cache_key(view, request, models):
+    """
+    Cache key of a read response: the view's model and action, the path and
+    normalized query string, and the generations of every model it reads.
+    """
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    digest = hashlib.sha1(f"{request.path}?{query}".encode()).hexdigest()
+    generations = '.'.join(get_generations(models))
+
+    return f"api:response:{view.model._meta.label_lower}:{view.action}:{digest}:{generations}"
+
+## Signal receivers, connected in ApiConfig.ready()
+def invalidate_on_save(sender, raw=False, **kwargs):
+    if not raw:
+        bump_generation(sender)
+
+def invalidate_on_delete(sender, **kwargs):
+    bump_generation(sender)
+
+def invalidate_on_m2m_change(sender, instance, action, model, **kwargs):
+    if action.startswith('post_'):
+        bump_generation(instance.__class__, model, sender)
@@ -0,0 +1,172 @@
+import asyncio
+import datetime
+import json
+import time
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Q
+from rest_framework.renderers import BaseRenderer
+from .models import ChangeNotice
+
+# Notices older than this are pruned by the `dbmaintenance` command.
+CHANGE_NOTICE_RETENTION = datetime.timedelta(days=1)
+
+def publish_changes(model, instances, action):
+    """
+    Record a change notice for each written instance. Notices are inserted
+    in the caller's transaction, so rolled back writes are never announced.
+    Returns the created notices.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+
+    return ChangeNotice.objects.bulk_create(
+        [
+            ChangeNotice(
+                content_type=content_type,
+                object_id=str(instance.pk),
+                action=action,
+                last_modified=getattr(instance, 'last_modified', None),
+            )
+            for instance in instances
+        ],
+        batch_size=500,
+    )
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets views negotiate `Accept: text/event-stream`, as sent by EventSource.
+    Only error responses go through it; streams bypass rendering.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode(self.charset)
+
+class ChangeFeed:
+    """
+    Server-sent event stream of change notices matching a subscription.
+
+    Each notice is sent as a `change` event whose id is the notice id, so a
+    reconnecting EventSource resumes from its Last-Event-ID. Streams end
+    after `max_duration` seconds to free their worker; browsers reconnect
+    on their own.
+
+    Every open stream runs one query per `poll_interval`. Under WSGI it also
+    holds a sync worker for up to `max_duration`, so each connected client
+    takes a worker away from the API; serve the feed from the ASGI app,
+    where streams only wait on the event loop.
+    """
+    poll_interval = 1
+    heartbeat_interval = 15
+    max_duration = 300
+    batch_size = 200
+
+    def __init__(self, filters, cursor=None):
+        self.filters = filters
+        self.cursor = cursor
+
+    @classmethod
+    def for_subscription(cls, user, models=None, objects=None, cursor=None):
+        """
+        Build a feed limited to the content types `user` may view. `models`
+        are content type model names; `objects` are (model name, id) pairs.
+        Either subscription narrows the feed; with neither, every viewable
+        model is included.
+        """
+        viewable = {
+            content_type.model : content_type.id
+            for content_type in ContentType.objects.all()
+            if user.has_perm(f"{content_type.app_label}.view_{content_type.model}")
+        }
+
+        filters = Q()
+        for model_name in models or []:
+            if model_name in viewable:
+                filters |= Q(content_type_id=viewable[model_name])
+        for model_name, object_id in objects or []:
+            if model_name in viewable:
+                filters |= Q(content_type_id=viewable[model_name], object_id=str(object_id))
+
+        if not models and not objects:
+            filters = Q(content_type_id__in=viewable.values())
+        elif not filters:
+            # Nothing the user is allowed to see was requested.
+            filters = Q(pk__in=[])
+
+        return cls(filters, cursor)
+
+    def open(self):
+        if self.cursor is None:
+            self.cursor = ChangeNotice.objects.aggregate(latest=Max('id'))['latest'] or 0
+
+    def fetch(self):
+        """
+        Format the notices after the cursor as server-sent events.
+        """
+        notices = list(
+            ChangeNotice.objects
+            .select_related('content_type')
+            .filter(self.filters, id__gt=self.cursor)
+            .order_by('id')[:self.batch_size]
+        )
+        if notices:
+            self.cursor = notices[-1].id
+
+        return [self.format_event(notice) for notice in notices]
+
+    def format_event(self, notice):
+        data = json.dumps(
+            {
+                'model': notice.content_type.model,
+                'id': notice.object_id,
+                'action': notice.action,
+                'last_modified': notice.last_modified,
+            },
+            cls=DjangoJSONEncoder,
+        )
+        return f"id: {notice.id}\nevent: change\ndata: {data}\n\n"
+
+    def events(self):
+        """
+        Event stream for WSGI servers.
+        """
+        self.open()
+        yield f"retry: {int(self.poll_interval * 3000)}\n\n"
+
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < self.max_duration:
+            events = self.fetch()
+            yield from events
+
+            if events:
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= self.heartbeat_interval:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+
+            time.sleep(self.poll_interval)
+
+    async def aevents(self):
+        """
+        Event stream for ASGI servers; waits between polls without holding a
+        worker thread.
+        """
+        await sync_to_async(self.open)()
+        yield f"retry: {int(self.poll_interval * 3000)}\n\n"
+
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < self.max_duration:
+            events = await sync_to_async(self.fetch)()
+            for event in events:
+                yield event
+
+            if events:
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= self.heartbeat_interval:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,59 @@
+"""
+SQLite tuning of the production database profile, see `DATABASE_PROFILE`
+in the settings.
+
+Every new SQLite connection applies `SQLITE_PRAGMAS`. The `readonly`
+connection is also made `query_only`, and `ReadOnlyRouter` sends the reads
+of safe (GET, HEAD, OPTIONS) `BaseView` requests to it, so list reads don't
+queue behind the writer.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+READ_ONLY_ALIAS = 'readonly'
+
+# Set while a view handles a request that may read from a replica.
+read_only_request = ContextVar('read_only_request', default=False)
+
+@contextmanager
+def reading_from_replica(enabled=True):
+    token = read_only_request.set(enabled)
+    try:
+        yield
+    finally:
+        read_only_request.reset(token)
+
+class ReadOnlyRouter:
+    """
+    Routes reads to the `readonly` alias inside `reading_from_replica()`,
+    unless the default connection is in a transaction, whose uncommitted
+    writes only it can see. Writes and migrations always use the default.
+    """
+
+    def db_for_read(self, model, **hints):
+        if read_only_request.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return READ_ONLY_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases open the same database file.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+## Signal receivers, connected in ApiConfig.ready()
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+        if connection.alias == READ_ONLY_ALIAS:
+            cursor.execute('PRAGMA query_only = ON')
@@ -14,5 +14,7 @@ class AssetFilter(django_filters.FilterSet):
             'model',
             'location',
             'condition',
-            'is_container'
+            'is_container',
+            'root_shipment',
+            'depth'
         ]
\ No newline at end of file
@@ -0,0 +1,136 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from .profiler import profile_request, wants_profile
+
+logger = logging.getLogger(__name__)
+
+# Characters of each statement written to the log. Bulk writes produce
+# statements of many kilobytes.
+LOGGED_SQL_LENGTH = 500
+
+class QueryStats:
+    """
+    Database execute wrapper tallying the queries of one request. Queries
+    are grouped by their SQL before parameters are bound, so the same
+    statement run once per row (an N+1) shows up as one repeated entry.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+
+            statement = self.statements.setdefault(sql, [0, 0.0])
+            statement[0] += 1
+            statement[1] += elapsed
+
+    def summarize(self, statements):
+        return [
+            {
+                'sql': sql if len(sql) <= LOGGED_SQL_LENGTH else f'{sql[:LOGGED_SQL_LENGTH]}...',
+                'count': count,
+                'ms': round(duration * 1000, 2),
+            }
+            for sql, (count, duration) in statements
+        ]
+
+    def repeated(self, threshold):
+        """
+        Statements run at least `threshold` times, most frequent first.
+        """
+        statements = [item for item in self.statements.items() if item[1][0] >= threshold]
+        return self.summarize(sorted(statements, key=lambda item: item[1][0], reverse=True))
+
+    def slowest(self, limit):
+        """
+        The `limit` statements with the most total time.
+        """
+        return self.summarize(sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:limit])
+
+class SQLInstrumentationMiddleware:
+    """
+    Counts and times the SQL of every request, and reports it in a
+    `Server-Timing` header:
+
+        Server-Timing: sql;dur=12.5;desc="18 queries", app;dur=40.1
+
+    Requests slower than `SLOW_REQUEST_MS`, or that repeat a statement at
+    least `REPEATED_QUERY_THRESHOLD` times, are logged as JSON with their
+    slowest and repeated statements. When `SQL_INSTRUMENTATION['ENABLED']`
+    is off the middleware removes itself at startup.
+    """
+
+    def __init__(self, get_response):
+        config = settings.SQL_INSTRUMENTATION
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.slow_request_seconds = config['SLOW_REQUEST_MS'] / 1000
+        self.repeated_query_threshold = config['REPEATED_QUERY_THRESHOLD']
+        self.top_queries = config['TOP_QUERIES']
+
+    def __call__(self, request):
+        stats = QueryStats()
+        started = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - started
+
+        response['Server-Timing'] = ', '.join(filter(None, [
+            response.get('Server-Timing'),
+            f'sql;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"',
+            f'app;dur={duration * 1000:.1f}',
+        ]))
+
+        repeated = stats.repeated(self.repeated_query_threshold)
+        if duration >= self.slow_request_seconds or repeated:
+            logger.warning(json.dumps({
+                'event': 'slow_request' if duration >= self.slow_request_seconds else 'repeated_queries',
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'user': getattr(getattr(request, 'user', None), 'pk', None),
+                'duration_ms': round(duration * 1000, 1),
+                'sql_count': stats.count,
+                'sql_ms': round(stats.duration * 1000, 1),
+                'repeated_queries': repeated,
+                'top_queries': stats.slowest(self.top_queries),
+            }))
+
+        return response
+
+class RequestProfilerMiddleware:
+    """
+    Profiles requests of staff users that ask for it, see `api.profiler`.
+    Must come after `AuthenticationMiddleware`.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILER_ENABLED:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if wants_profile(request):
+            return profile_request(request, self.get_response)
+        return self.get_response(request)
@@ -1,3 +1,50 @@
+from django.conf import settings
 from django.db import models
+from django.contrib.contenttypes.models import ContentType
+from django.utils.translation import gettext_lazy as _
 
 # Create your models here.
+class ChangeNotice(models.Model):
+    """
+    A compact record of a write, streamed to clients by the change feed.
+    The auto-incrementing id doubles as the feed's event id.
+    """
+    ACTION_OPTIONS = (
+        ("created", "Created"),
+        ("updated", "Updated"),
+        ("deleted", "Deleted"),
+    )
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.CharField(_("Object ID"), max_length=64)
+    action = models.CharField(_("Action"), max_length=7, choices=ACTION_OPTIONS)
+    last_modified = models.DateTimeField(_("Last Modified"), blank=True, null=True)
+    time = models.DateTimeField(_("Time"), auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.content_type.model}:{self.object_id} {self.action}"
+
+class RequestProfile(models.Model):
+    """
+    A request profiled on demand by a staff user, see `api.profiler`: its
+    cProfile stats and a report of its SQL with query plans.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True)
+    method = models.CharField(_("Method"), max_length=10)
+    path = models.CharField(_("Path"), max_length=2000)
+    status_code = models.PositiveSmallIntegerField(_("Status Code"))
+    duration = models.FloatField(_("Duration (ms)"))
+    query_count = models.PositiveIntegerField(_("Queries"))
+    query_duration = models.FloatField(_("SQL Duration (ms)"))
+    profile = models.FileField(_("Profile"), upload_to="profiles/")
+    report = models.FileField(_("Report"), upload_to="profiles/")
+    time = models.DateTimeField(_("Time"), auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration:.0f} ms)"
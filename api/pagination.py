@@ -0,0 +1,191 @@
+import base64
+import json
+from collections import OrderedDict
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset (cursor) mode.
+
+    Requests carrying a `cursor` query parameter (empty for the first page)
+    are paginated by seeking past the last row of the previous page on the
+    queryset's ordering, which defaults to the model's `Meta.ordering` with
+    the primary key as a tie-breaker. Each page then costs the same however
+    deep it is. `?count=false` skips the COUNT(*) query and `?page_size=`
+    picks a page size up to `max_page_size`.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    page_size_query_param = 'page_size'
+    max_page_size = 5000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.keyset = True
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        ordering = self.get_ordering(queryset)
+        self.count = queryset.count() if self.include_count(request) else None
+
+        queryset = queryset.order_by(*[
+            F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_first=True)
+            for name, descending in ordering
+        ])
+
+        position = self.decode_cursor(request, queryset.model, ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(queryset.model, ordering, position))
+
+        page = list(queryset[:page_size + 1])
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+
+        self.next_position = self.get_position(page[-1], ordering) if self.has_next else None
+
+        return page
+
+    def get_paginated_response(self, data):
+        if not getattr(self, 'keyset', False):
+            return super().get_paginated_response(data)
+
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['previous'] = None
+        payload['results'] = data
+
+        return Response(payload)
+
+    def get_next_link(self):
+        if not getattr(self, 'keyset', False):
+            return super().get_next_link()
+
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def include_count(self, request):
+        return request.query_params.get(self.count_query_param, 'true').lower() not in ('0', 'false', 'no')
+
+    def get_ordering(self, queryset):
+        """
+        (field name, descending) pairs ending in the primary key, so that
+        every row has a unique position. Names may follow forward relations,
+        e.g. `content_type__app_label`. If any can't be resolved to a single
+        valued field, rows are ordered by the primary key alone.
+        """
+        opts = queryset.model._meta
+        ordering = []
+
+        for name in (queryset.query.order_by or opts.ordering or []):
+            if not isinstance(name, str):
+                continue
+            descending = name.startswith('-')
+            name = opts.pk.name if name.lstrip('-') == 'pk' else name.lstrip('-')
+            if self.resolve_field(queryset.model, name) is None:
+                return [(opts.pk.name, False)]
+            ordering.append((name, descending))
+
+        if opts.pk.name not in [name for name, _ in ordering]:
+            ordering.append((opts.pk.name, ordering[-1][1] if ordering else False))
+
+        return ordering
+
+    def resolve_field(self, model, name):
+        """
+        The concrete field a lookup path ends on, following forward foreign
+        keys and one-to-one fields, or None.
+        """
+        field = None
+        for part in name.split(LOOKUP_SEP):
+            if field is not None:
+                if not (field.many_to_one or field.one_to_one) or not field.concrete:
+                    return None
+                model = field.related_model
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                return None
+
+        if not field.concrete or field.many_to_many:
+            return None
+        return field
+
+    def get_position(self, instance, ordering):
+        """
+        Values of `ordering` on `instance`, following relations from it. A
+        NULL anywhere along the path makes the value None.
+        """
+        position = []
+        for name, _ in ordering:
+            *path, last = name.split(LOOKUP_SEP)
+            target = instance
+            for part in path:
+                target = getattr(target, part) if target is not None else None
+
+            field = self.resolve_field(type(instance), name)
+            if target is None or getattr(target, field.attname) is None:
+                position.append(None)
+            else:
+                position.append(field.value_to_string(target))
+
+        return position
+
+    def get_seek_filter(self, model, ordering, position):
+        """
+        Rows strictly after `position`: (a > x) | (a = x & b > y) | ...
+        NULLs sort before every value, matching the order_by above.
+        """
+        seek = Q(pk__in=[])
+        equal = Q()
+
+        for (name, descending), value in zip(ordering, position):
+            if value is None:
+                after = Q(pk__in=[]) if descending else Q(**{f"{name}__isnull": False})
+                same = Q(**{f"{name}__isnull": True})
+            elif descending:
+                after = Q(**{f"{name}__lt": value}) | Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            else:
+                after = Q(**{f"{name}__gt": value})
+                same = Q(**{name: value})
+
+            seek |= equal & after
+            equal &= same
+
+        return seek
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request, model, ordering):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            assert isinstance(position, list) and len(position) == len(ordering)
+            return [
+                None if value is None else self.resolve_field(model, name).to_python(value)
+                for (name, _), value in zip(ordering, position)
+            ]
+        except (TypeError, ValueError, AssertionError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
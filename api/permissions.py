@@ -17,3 +17,14 @@ class ScanToolPermission(BasePermission):
         Return `True` if permission is granted, `False` otherwise.
         """
         return False
+
+class ReceiveShipmentPermission(BasePermission):
+    """
+    Allows a user to receive the contents of shipments
+    """
+
+    def has_permission(self, request, view):
+        """
+        Return `True` if permission is granted, `False` otherwise.
+        """
+        return bool(request.user.has_perm("assets.receive"))
@@ -0,0 +1,179 @@
+"""
+On-demand profiling of single requests, for staff users.
+
+Add `?profile=1` to a URL, or send an `X-Profile: 1` header, and the request
+runs under cProfile while its SQL is recorded. Afterwards every statement is
+run through `EXPLAIN QUERY PLAN`, and a `RequestProfile` is saved with the
+`.prof` file and a plain text report under `MEDIA_ROOT/profiles/`. Both can
+be downloaded from the admin; the response's `X-Profile` header links there.
+
+The query parameter also changes the response cache key, so it profiles a
+cold request. The header may profile a cached response.
+"""
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import time
+from contextlib import ExitStack
+from django.core.files.base import ContentFile
+from django.db import connections
+from django.urls import reverse
+from django.utils import timezone
+
+PROFILE_PARAMETER = 'profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+# Functions listed in the report, by cumulative time.
+REPORT_FUNCTIONS = 40
+
+# Statements that have no query plan.
+UNEXPLAINED_STATEMENTS = ('SAVEPOINT', 'RELEASE', 'ROLLBACK', 'BEGIN', 'COMMIT')
+
+def wants_profile(request):
+    flag = request.GET.get(PROFILE_PARAMETER) or request.META.get(PROFILE_HEADER)
+    if flag not in ('1', 'true'):
+        return False
+
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+class QueryRecorder:
+    """
+    Database execute wrapper keeping the first parameters, count and total
+    time of every distinct statement, to be explained later.
+    """
+
+    def __init__(self):
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            key = (context['connection'].alias, sql)
+            if key not in self.statements:
+                self.statements[key] = {
+                    'params': params[0] if many and params else params,
+                    'count': 0,
+                    'duration': 0.0,
+                }
+            self.statements[key]['count'] += 1
+            self.statements[key]['duration'] += elapsed
+
+    @property
+    def count(self):
+        return sum(statement['count'] for statement in self.statements.values())
+
+    @property
+    def duration(self):
+        return sum(statement['duration'] for statement in self.statements.values())
+
+def explain(alias, sql, params):
+    """
+    Query plan of `sql` as a list of lines. The statement isn't executed.
+    """
+    if sql.lstrip().upper().startswith(UNEXPLAINED_STATEMENTS):
+        return []
+
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                # Rows are (id, parent, notused, detail); indent by nesting.
+                depths = {0: 0}
+                lines = []
+                for node, parent, _, detail in cursor.fetchall():
+                    depths[node] = depths.get(parent, 0) + 1
+                    lines.append('  ' * (depths[node] - 1) + detail)
+                return lines
+
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+    except Exception as error:
+        return [f'Could not explain: {error}']
+
+def build_report(request, response, duration, queries, stats):
+    lines = [
+        f'{request.method} {request.get_full_path()}',
+        f'Status {response.status_code}, {duration * 1000:.1f} ms, '
+        f'{queries.count} queries in {queries.duration * 1000:.1f} ms',
+        f'Profiled for {request.user} at {timezone.now().isoformat()}',
+        '',
+        '## SQL, by total time',
+    ]
+
+    statements = sorted(queries.statements.items(), key=lambda item: item[1]['duration'], reverse=True)
+    for number, ((alias, sql), statement) in enumerate(statements, start=1):
+        lines += [
+            '',
+            f'#{number} [{alias}] {statement["count"]}x, {statement["duration"] * 1000:.2f} ms',
+            sql,
+            f'Parameters: {statement["params"]!r}',
+        ]
+        lines += [f'    {line}' for line in explain(alias, sql, statement['params'])]
+
+    output = io.StringIO()
+    stats.stream = output
+    stats.sort_stats('cumulative').print_stats(REPORT_FUNCTIONS)
+    lines += ['', f'## Python, top {REPORT_FUNCTIONS} functions by cumulative time', output.getvalue()]
+
+    return '\n'.join(lines)
+
+def profile_request(request, get_response):
+    """
+    Run `get_response(request)` under cProfile, save a `RequestProfile` of
+    it, and return the response.
+    """
+    from .models import RequestProfile
+
+    queries = QueryRecorder()
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(queries))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+
+    duration = time.perf_counter() - started
+    stats = pstats.Stats(profiler)
+
+    # pstats can only write its binary format to a named file.
+    with tempfile.TemporaryDirectory() as directory:
+        prof_path = os.path.join(directory, 'request.prof')
+        stats.dump_stats(prof_path)
+        with open(prof_path, 'rb') as prof_file:
+            prof_data = prof_file.read()
+
+    report = build_report(request, response, duration, queries, stats)
+
+    profile = RequestProfile(
+        user=request.user,
+        method=request.method,
+        path=request.get_full_path()[:RequestProfile._meta.get_field('path').max_length],
+        status_code=response.status_code,
+        duration=round(duration * 1000, 1),
+        query_count=queries.count,
+        query_duration=round(queries.duration * 1000, 1),
+    )
+    name = timezone.now().strftime('%Y%m%d-%H%M%S')
+    profile.profile.save(f'{name}.prof', ContentFile(prof_data), save=False)
+    profile.report.save(f'{name}.txt', ContentFile(report.encode()), save=False)
+    profile.save()
+
+    response['X-Profile'] = reverse('admin:api_requestprofile_change', args=[profile.id])
+    return response
+
+## Signal receivers, connected in ApiConfig.ready()
+def delete_profile_files(sender, instance, **kwargs):
+    instance.profile.delete(save=False)
+    instance.report.delete(save=False)
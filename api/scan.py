@@ -0,0 +1,166 @@
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.contrib.contenttypes.models import ContentType
+from assets.models import Asset, Shipment
+from .cache import bump_generation
+from .changes import publish_changes
+from .exceptions import InvalidData
+from .serializers import AssetSerializer, ShipmentSerializer, content_tree_prefetch
+
+# Models assets can be scanned into, by content type name.
+SCAN_DESTINATION_MODELS = {
+    'shipment' : Shipment,
+    'asset' : Asset
+}
+
+def get_scan_destination(shipment, destination_content_type, destination_id):
+    """
+    Resolve the shipment or container asset a scan enters assets into.
+    """
+    if destination_content_type not in SCAN_DESTINATION_MODELS:
+        # Unknown Destination Content Type
+        raise InvalidData("The provided destination content-type is not permitted.")
+
+    destination_model = SCAN_DESTINATION_MODELS[destination_content_type]
+
+    if destination_model is Shipment and str(destination_id) == str(shipment.id):
+        destination_object = shipment
+    else:
+        try:
+            destination_object = destination_model.objects.get(id=destination_id)
+        except (ObjectDoesNotExist, ValueError):
+            raise InvalidData(f"A scan destination of type '{destination_model.__name__}' with id '{destination_id}' does not exist.")
+
+    if not destination_object.can_accept_scan_entries():
+        raise InvalidData(f"{destination_object} cannot accept scan entries.")
+
+    return destination_object
+
+def scan_asset_codes(shipment, destination_object, asset_codes):
+    """
+    Scan a list of asset codes into a single destination.
+
+    All codes are resolved with one query, the parent rules of
+    `Asset.clean_parent` are applied in memory and every accepted
+    asset is written in a single transaction. Returns a result for each
+    submitted code, the accepted assets by code and the change notices
+    published for them.
+    """
+    shipment_content_type = ContentType.objects.get_for_model(Shipment)
+    destination_content_type = ContentType.objects.get_for_model(destination_object.__class__)
+
+    # Retrieve every Entry Object with a single query
+    entry_codes = [str(code) for code in asset_codes]
+    entries = {
+        entry.code : entry
+        for entry in Asset.objects.select_related('model').filter(code__in=set(entry_codes))
+    }
+
+    results = []
+    accepted = {}
+    previous_containment = {}
+    notices = []
+
+    for code in entry_codes:
+        entry = entries.get(code)
+
+        if entry is None:
+            results.append({'asset_code': code, 'result': 'unknown', 'detail': f"An asset with code '{code}' does not exist."})
+            continue
+
+        # Verify Entry and Destination are NOT both containers.
+        if getattr(destination_object, 'is_container', False) and entry.is_container:
+            # Silently scan the entry object into the shipment rather than the provided destination
+            target, target_content_type = shipment, shipment_content_type
+        else:
+            target, target_content_type = destination_object, destination_content_type
+
+        # Verify Entry Parent is Blank
+        if entry.parent_object_id is not None:
+            in_target = entry.parent_content_type_id == target_content_type.id and entry.parent_object_id == target.id
+
+            # Allow users to re-select container objects if they already exist within the shipment
+            if entry.is_container and entry.parent_content_type_id == shipment_content_type.id and entry.parent_object_id == shipment.id:
+                results.append({'asset_code': code, 'result': 'accepted', 'id': entry.id})
+                continue
+
+            # Duplicate codes within the same batch
+            if code in accepted and in_target:
+                results.append({'asset_code': code, 'result': 'accepted', 'id': entry.id})
+                continue
+
+            results.append({'asset_code': code, 'result': 'locked', 'detail': "This asset is already locked to another shipment or container.", 'id': entry.id})
+            continue
+
+        # Model Validation (mirrors Asset.clean)
+        if not entry.code.startswith(entry.model.model_code):
+            results.append({'asset_code': code, 'result': 'rejected', 'detail': "Asset Codes must start with their Model's model_code.", 'id': entry.id})
+            continue
+
+        if isinstance(target, Asset) and target.pk == entry.pk:
+            results.append({'asset_code': code, 'result': 'rejected', 'detail': "An asset cannot be scanned into itself.", 'id': entry.id})
+            continue
+
+        try:
+            Asset.clean_parent(target_content_type.model, target, entry.pk)
+        except ValidationError as e:
+            results.append({'asset_code': code, 'result': 'rejected', 'detail': ' '.join(e.messages), 'id': entry.id})
+            continue
+
+        previous_containment[code] = (entry.containment_prefix(), entry.depth)
+        entry.parent_content_type = target_content_type
+        entry.parent_object_id = target.id
+        entry.set_containment(target)
+        accepted[code] = entry
+        results.append({'asset_code': code, 'result': 'accepted', 'id': entry.id})
+
+    # Perform Save
+    if accepted:
+        now = timezone.now()
+        for entry in accepted.values():
+            entry.last_modified = now
+
+        with transaction.atomic():
+            Asset.objects.bulk_update(accepted.values(), ['parent_content_type', 'parent_object_id', 'root_shipment', 'depth', 'path', 'last_modified'])
+
+            # Carry the contents of any scanned containers along with them.
+            for code, entry in accepted.items():
+                if entry.is_container:
+                    entry.update_descendant_containment(*previous_containment[code])
+
+            notices += publish_changes(Asset, accepted.values(), 'updated')
+            notices += publish_changes(Shipment, [shipment], 'updated')
+
+            # bulk_update doesn't send model signals.
+            bump_generation(Asset)
+
+    return results, accepted, notices
+
+def get_scan_diff(shipment, asset_ids, notices=()):
+    """
+    Incremental change to a shipment's contents after a scan: each scanned
+    asset (with its own contents) and the container asset it now sits in,
+    or None when it sits directly in the shipment, plus the new asset counts
+    and the ids of the change notices the diff already accounts for.
+    """
+    scanned = (
+        Asset.objects
+        .select_related('model')
+        .prefetch_related(content_tree_prefetch())
+        .filter(id__in=asset_ids)
+        .order_by('depth', 'id')
+    )
+
+    return {
+        'shipment': shipment.id,
+        'assets': [
+            {
+                'parent': asset.parent_object_id if asset.depth > 1 else None,
+                'asset': AssetSerializer(asset).data,
+            }
+            for asset in scanned
+        ],
+        'asset_counts': ShipmentSerializer(shipment, fields=['asset_counts']).data['asset_counts'],
+        'changes': [notice.id for notice in notices],
+    }
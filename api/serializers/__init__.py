@@ -5,6 +5,7 @@ from .assets_serializers import AssetIconSerializer
 from .assets_serializers import LocationSerializer
 from .assets_serializers import ShipmentSerializer
 from .assets_serializers import ContentAssetsField
+from .assets_serializers import content_tree_prefetch
 from .assets_serializers import ReservationSerializer
 from .assets_serializers import ReservationItemSerializer
 # App Related Imports : Main
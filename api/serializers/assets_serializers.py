@@ -1,21 +1,53 @@
 from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.db.models.manager import BaseManager
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 from rest_framework import serializers
 from assets.models import Asset, Model, AssetIcon, Location, Shipment, Reservation, ReservationItem
 from .base_serializers import CustomBaseSerializer, ContentTypeSerializer
+from ..availability import get_model_availability
+from ..cache import bump_generation
 
+# Shipments hold containers which hold assets (see `Asset.clean`), so the
+# contents tree below any object is at most this many levels deep.
+CONTENT_TREE_DEPTH = 2
+
+def content_tree_prefetch(depth=CONTENT_TREE_DEPTH + 1):
+    """
+    Build a nested `Prefetch` for the `assets` relation of shipments and
+    assets. Evaluating a page of objects with it loads every descendant
+    with one query per depth level, so `ContentAssetsField` can build the
+    nested structure in memory.
+    """
+    lookup = None
+    for _ in range(depth):
+        queryset = Asset.objects.select_related('model')
+        if lookup is not None:
+            queryset = queryset.prefetch_related(lookup)
+        lookup = Prefetch('assets', queryset=queryset)
+
+    return lookup
 
 class ContentAssetsField(serializers.ReadOnlyField):
     """
     Generic Foreign Key relations are serialized into an appropriate
-    JSON representation.
+    JSON representation. Querysets should be built with
+    `content_tree_prefetch()` to avoid a query per nested object.
     """
 
     def get_attribute(self, instance):
         return instance # Returning the entire instance rather than just one of its attributes.
 
     def to_representation(self, value):
+        # Nested contents are expanded with the remainder of dotted paths,
+        # e.g. `assets.assets` expands two levels.
+        expand = getattr(self.parent, 'expand', None)
+        if expand is not None:
+            expand = [path.split('.', 1)[1] for path in expand if path.startswith(f"{self.field_name}.")]
+
         related_objects = value.assets.all()
-        return [AssetSerializer(object).data for object in related_objects]
+        return [AssetSerializer(object, context=self.context, expand=expand).data for object in related_objects]
 
 class AssetSerializer(CustomBaseSerializer):
     assets = ContentAssetsField()
@@ -44,6 +76,7 @@ class AssetSerializer(CustomBaseSerializer):
             "assets",
             "condition"
         ]
+        expandable_fields = ["assets"]
 
 class AssetIconSerializer(CustomBaseSerializer):
 
@@ -89,6 +122,84 @@ class LocationSerializer(CustomBaseSerializer):
             "is_warehouse"
         ]
 
+def attach_asset_counts(shipments):
+    """
+    Compute direct, extended and total asset counts for every shipment with
+    one grouped query and store them on the instances as `_asset_counts`.
+    """
+    shipments = [shipment for shipment in shipments if shipment.pk is not None]
+    counts = {shipment.pk : {'direct_children': 0, 'extended_children': 0} for shipment in shipments}
+
+    if counts:
+        rows = (
+            Asset.objects
+            .filter(parent_content_type=ContentType.objects.get_for_model(Shipment), parent_object_id__in=counts.keys())
+            .order_by()
+            .values('parent_object_id')
+            .annotate(direct_children=Count('id', distinct=True), extended_children=Count('assets'))
+        )
+        for row in rows:
+            counts[row['parent_object_id']] = {
+                'direct_children': row['direct_children'],
+                'extended_children': row['extended_children'],
+            }
+
+    for shipment in shipments:
+        shipment._asset_counts = counts[shipment.pk]
+
+def attach_packed_asset_details(shipments, context=None):
+    """
+    Serialize every asset listed in the packed manifests of `shipments` with
+    one query and store them on the instances as `_packed_asset_details`,
+    keyed by asset id.
+    """
+    manifests = {
+        shipment.pk : shipment.packed_assets
+        for shipment in shipments
+        if Shipment.is_packed_manifest(shipment.packed_assets)
+    }
+    asset_ids = {entry['id'] for manifest in manifests.values() for entry in manifest}
+
+    details = {}
+    if asset_ids:
+        assets = Asset.objects.select_related('model').filter(id__in=asset_ids)
+        details = {asset['id'] : asset for asset in AssetSerializer(assets, many=True, context=context, exclude=['assets']).data}
+
+    for shipment in shipments:
+        shipment._packed_asset_details = details
+
+def expand_packed_manifest(manifest, details):
+    """
+    Nest a compact manifest back into the shape of `AssetSerializer` output,
+    using current asset details. Assets deleted since packing keep the
+    fields recorded in the manifest.
+    """
+    nodes = {}
+    roots = []
+    for entry in manifest:
+        node = dict(details.get(entry['id'], {'id': entry['id'], 'code': entry['code'], 'model': entry['model']}))
+        node['assets'] = []
+        nodes[entry['id']] = node
+
+        parent = nodes.get(entry['parent'])
+        (parent['assets'] if parent is not None else roots).append(node)
+
+    return roots
+
+class ShipmentListSerializer(serializers.ListSerializer):
+    """
+    Attaches asset counts, and packed asset details when expanded, to a whole
+    page of shipments before serializing.
+    """
+
+    def to_representation(self, data):
+        iterable = list(data.all() if isinstance(data, BaseManager) else data)
+        if 'asset_counts' in self.child.fields:
+            attach_asset_counts(iterable)
+        if 'packed_assets' in self.child.fields and self.child.expands_packed_asset_details():
+            attach_packed_asset_details(iterable, self.context)
+        return super().to_representation(iterable)
+
 class ShipmentSerializer(CustomBaseSerializer):
     
     assets = ContentAssetsField()
@@ -112,18 +223,37 @@ class ShipmentSerializer(CustomBaseSerializer):
             "packed_assets",
             "return_shipment",
         ]
+        list_serializer_class = ShipmentListSerializer
+        expandable_fields = ["assets", "packed_assets"]
+
+    def expands_packed_asset_details(self):
+        return 'packed_assets.detail' in (self.expand or [])
 
     def get_packed_assets(self, obj):
+        """
+        The compact packed manifest, or with `?expand=packed_assets.detail`
+        the packed assets nested with their full details.
+        """
+        snapshot = obj.packed_assets
 
-        return obj.packed_assets
+        if not Shipment.is_packed_manifest(snapshot):
+            # Nested snapshot from before manifests were compact, see `compactpackedassets`.
+            return snapshot if self.expands_packed_asset_details() else Shipment.compact_packed_assets(snapshot)
+
+        if not self.expands_packed_asset_details():
+            return snapshot
+
+        if not hasattr(obj, '_packed_asset_details'):
+            attach_packed_asset_details([obj], self.context)
+
+        return expand_packed_manifest(snapshot, obj._packed_asset_details)
     
     def get_asset_counts(self, obj):
-        children=obj.assets.all()
+        if not hasattr(obj, '_asset_counts'):
+            attach_asset_counts([obj])
 
-        direct_child_count = children.count()
-        extended_child_count = 0
-        for child in children:
-            extended_child_count+= child.assets.count()
+        direct_child_count = obj._asset_counts['direct_children']
+        extended_child_count = obj._asset_counts['extended_children']
 
         return {
             'total_assets' : direct_child_count + extended_child_count,
@@ -131,11 +261,44 @@ class ShipmentSerializer(CustomBaseSerializer):
             'extended_children' : extended_child_count
         }
 
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Takes related objects from `preloaded`, a dict keyed by primary key,
+    before falling back to querying for them.
+    """
+    preloaded = None
+
+    def to_internal_value(self, data):
+        try:
+            return self.preloaded[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+class ReservationItemListSerializer(serializers.ListSerializer):
+    """
+    Resolves the models of every incoming item with a single query.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            model_ids = set()
+            for item in data:
+                try:
+                    model_ids.add(int(item['model']))
+                except (KeyError, TypeError, ValueError):
+                    pass
+
+            self.child.fields['model'].preloaded = Model.objects.in_bulk(model_ids)
+
+        return super().to_internal_value(data)
+
 class ReservationItemSerializer(CustomBaseSerializer):
+    model = PreloadedPrimaryKeyRelatedField(queryset=Model.objects.all())
 
     class Meta:
         model = ReservationItem
         fields = ['id', 'model', 'quantity']
+        list_serializer_class = ReservationItemListSerializer
 
 class ReservationSerializer(CustomBaseSerializer):
     reservation_items = ReservationItemSerializer(many=True, required=False)  # Nested ReservationItem serializer
@@ -153,47 +316,117 @@ class ReservationSerializer(CustomBaseSerializer):
             'reservation_items',
         ]
 
-    def create(self, validated_data):
+    def validate(self, attrs):
         """
-        Custom create method to handle nested reservation items.
+        Reject holds that need more of a model than is available on any of
+        their days, not counting this hold's own items. An update that only
+        moves the dates is checked against the items the hold already has.
         """
-        reservation_items_data = self.initial_data.get('reservation_items')  # Use initial_data
+        attrs = super().validate(attrs)
+        items = attrs.get('reservation_items')
+        if items is None and self.instance is not None and ('start_date' in attrs or 'end_date' in attrs):
+            items = [
+                {'model': item.model, 'quantity': item.quantity}
+                for item in self.instance.reservation_items.select_related('model')
+            ]
+
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+
+        if not items or start_date is None or end_date is None:
+            return attrs
 
-        reservation = Reservation.objects.create(
-            start_date=validated_data['start_date'],
-            end_date=validated_data['end_date'],
+        models = {item['model'].pk: item['model'] for item in items}
+        requested = {}
+        for item in items:
+            requested[item['model'].pk] = requested.get(item['model'].pk, 0) + item['quantity']
+
+        availability = get_model_availability(
+            start_date,
+            end_date,
+            model_ids=list(requested),
+            exclude_reservation=getattr(self.instance, 'pk', None),
         )
 
-        # Create ReservationItems
-        if reservation_items_data:
-            for item_data in reservation_items_data:
-                model_id = item_data['model']
-                quantity = item_data['quantity']
-                model = Model.objects.get(pk=model_id)
-                ReservationItem.objects.create(reservation=reservation, model=model, quantity=quantity)
+        errors = [
+            f"Only {availability[model_id]['min_available']} of {models[model_id]} available between {start_date} and {end_date}, {quantity} requested."
+            for model_id, quantity in requested.items()
+            if quantity > availability[model_id]['min_available']
+        ]
+        if errors:
+            raise serializers.ValidationError({'reservation_items': errors})
+
+        return attrs
+
+    def create(self, validated_data):
+        """
+        Create the hold and its items.
+        """
+        items = validated_data.pop('reservation_items', None)
+
+        with transaction.atomic():
+            reservation = super().create(validated_data)
+
+            if items:
+                self.write_reservation_items(reservation, items, existing=[])
 
         return reservation
 
     def update(self, instance, validated_data):
         """
-        Custom update method to handle nested reservation items.
+        Update the hold, and its items when they are supplied.
+        """
+        items = validated_data.pop('reservation_items', None)
+
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+
+            if items is not None:
+                self.write_reservation_items(instance, items)
+
+        return instance
+
+    def write_reservation_items(self, reservation, items, existing=None):
+        """
+        Bring the items of `reservation` in line with `items`, keeping one
+        item per model. Only items whose quantity changed are written: new
+        models are bulk created, changed quantities bulk updated and dropped
+        models deleted with one query each.
         """
-        reservation_items_data = self.initial_data.get('reservation_items')
-
-        # Update the instance fields
-        instance.title = validated_data.get('title', instance.title)
-        instance.start_date = validated_data.get('start_date', instance.start_date)
-        instance.end_date = validated_data.get('end_date', instance.end_date)
-        instance.shipment = validated_data.get('shipment', instance.shipment)
-        instance.save()
-
-        if reservation_items_data:
-            # Clear and re-add reservation items
-            instance.reservation_items.all().delete()
-            for item_data in reservation_items_data:
-                model_id = item_data['model']
-                quantity = item_data['quantity']
-                model = Model.objects.get(pk=model_id)
-                ReservationItem.objects.create(reservation=instance, model=model, quantity=quantity)
-
-        return instance
\ No newline at end of file
+        requested = {}
+        for item in items:
+            requested[item['model'].pk] = requested.get(item['model'].pk, 0) + item['quantity']
+
+        if existing is None:
+            existing = reservation.reservation_items.all()
+
+        current = {}
+        removed = []
+        for item in existing:
+            if item.model_id in requested and item.model_id not in current:
+                current[item.model_id] = item
+            else:
+                removed.append(item.pk)
+
+        now = timezone.now()
+        created = [
+            ReservationItem(reservation=reservation, model_id=model_id, quantity=quantity)
+            for model_id, quantity in requested.items()
+            if model_id not in current
+        ]
+        updated = []
+        for model_id, item in current.items():
+            if item.quantity != requested[model_id]:
+                item.quantity = requested[model_id]
+                item.last_modified = now
+                updated.append(item)
+
+        if removed:
+            ReservationItem.objects.filter(pk__in=removed).delete()
+        if updated:
+            ReservationItem.objects.bulk_update(updated, ['quantity', 'last_modified'])
+        if created:
+            ReservationItem.objects.bulk_create(created)
+        if removed or updated or created:
+            # Bulk writes send no save signals.
+            bump_generation(ReservationItem)
@@ -3,9 +3,32 @@ from django.contrib.admin.models import LogEntry
 from django.contrib.contenttypes.models import ContentType
 
 class CustomBaseSerializer(serializers.ModelSerializer):
+    """
+    Accepts optional `fields`, `exclude` and `expand` lists. Fields that are
+    left out are removed before serialization, so they are never computed.
+    Fields named in `Meta.expandable_fields` are only included when listed in
+    `expand`, unless `expand` is None.
+    """
 
     label = serializers.SerializerMethodField()
 
+    def __init__(self, *args, fields=None, exclude=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.expand = expand
+        omitted = set()
+
+        if fields is not None:
+            omitted |= set(self.fields) - set(fields)
+        if exclude is not None:
+            omitted |= set(exclude)
+        if expand is not None:
+            expanded = {path.split('.')[0] for path in expand}
+            omitted |= set(getattr(self.Meta, 'expandable_fields', [])) - expanded
+
+        for field_name in omitted:
+            self.fields.pop(field_name, None)
+
     def get_label(self, obj):
         return str(obj)
     
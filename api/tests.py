@@ -1,3 +1,552 @@
-from django.test import TestCase
+import datetime
+import json
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from assets.models import Asset, AssetIcon, Location, Model, Shipment, Reservation, ReservationItem
+from api.benchmarks import BenchmarkTestCase
+from api.cache import get_response_cache
+from api.changes import publish_changes
+from api.views import AssetView, ShipmentView
+from api.websockets import ScanSession
 
-# Create your tests here.
+class AssetsApiBenchmarks(BenchmarkTestCase):
+    """
+    Hot endpoints of the asset, shipment and scanning API.
+    """
+
+    def open_shipment(self):
+        return Shipment.objects.filter(status=0, contained_assets__isnull=False).order_by('id').first()
+
+    def loose_assets(self, count):
+        return list(
+            Asset.objects.filter(parent_content_type__isnull=True, is_container=False).order_by('id')[:count]
+        )
+
+    def cold_options(self, view_class):
+        """
+        Reset the caches and the OPTIONS metadata cached on `view_class`.
+        """
+        def reset():
+            self.reset_caches()
+            if '_options_metadata' in vars(view_class):
+                del view_class._options_metadata
+        return reset
+
+    def test_asset_list(self):
+        response = self.benchmark('asset-list', lambda: self.get('/api/asset/'))
+        self.assertEqual(response.json()['count'], Asset.objects.count())
+
+    def test_asset_list_keyset_page(self):
+        response = self.benchmark('asset-list-keyset-page', lambda: self.get('/api/asset/?cursor=&page_size=100&count=false'))
+        self.assertEqual(len(response.json()['results']), 100)
+        self.assertIsNotNone(response.json()['next'])
+
+    def test_asset_bulk_create(self):
+        crate = Asset.objects.filter(is_container=True, depth=0).order_by('id').first()
+        asset_type = ContentType.objects.get_for_model(Asset)
+        model = Model.objects.get(model_code='IPF')
+        rows = [
+            {'code': f'IPF9{number:06}', 'model': model.id, 'parent_content_type': asset_type.id, 'parent_object_id': crate.id}
+            for number in range(40)
+        ]
+        self.benchmark('asset-bulk-create', lambda: self.post('/api/asset/bulk/?key=code', rows))
+        self.assertEqual(crate.assets.filter(code__startswith='IPF9').count(), 40)
+
+    def test_asset_bulk_update(self):
+        crates = list(Asset.objects.filter(is_container=True, assets__isnull=False).distinct().order_by('id')[:40])
+        rows = [{'code': crate.code, 'model': crate.model_id, 'note': 'Benchmark note'} for crate in crates]
+        self.benchmark('asset-bulk-update', lambda: self.post('/api/asset/bulk/?key=code', rows))
+        self.assertEqual(Asset.objects.filter(note='Benchmark note').count(), len(crates))
+
+    def test_asset_retrieve(self):
+        crate = Asset.objects.filter(is_container=True, assets__isnull=False).order_by('id').first()
+        response = self.benchmark('asset-retrieve', lambda: self.get(f'/api/asset/{crate.id}/'))
+        self.assertEqual(len(response.json()['assets']), crate.assets.count())
+
+    def test_asset_options(self):
+        self.benchmark('asset-options', lambda: self.client.options('/api/asset/'), reset=self.cold_options(AssetView))
+
+    def test_asseticon_list(self):
+        self.benchmark('asseticon-list', lambda: self.get('/api/asseticon/'))
+
+    def test_model_list(self):
+        self.benchmark('model-list', lambda: self.get('/api/model/'))
+
+    def test_model_list_cached(self):
+        self.get('/api/model/')
+        self.benchmark('model-list-cached', lambda: self.get('/api/model/'), reset=lambda: None)
+
+    def test_location_list(self):
+        self.benchmark('location-list', lambda: self.get('/api/location/'))
+
+    def test_shipment_list(self):
+        response = self.benchmark('shipment-list', lambda: self.get('/api/shipment/'))
+        self.assertEqual(response.json()['count'], Shipment.objects.count())
+
+    def test_shipment_list_packed_detail(self):
+        self.benchmark('shipment-list-packed-detail', lambda: self.get('/api/shipment/?expand=packed_assets.detail'))
+
+    def test_shipment_list_not_modified(self):
+        etag = self.get('/api/shipment/')['ETag']
+        # Keep the response cache, which holds the generations the ETag is built from.
+        response = self.benchmark(
+            'shipment-list-not-modified',
+            lambda: self.client.get('/api/shipment/', HTTP_IF_NONE_MATCH=etag),
+            reset=ContentType.objects.clear_cache,
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_shipment_retrieve(self):
+        shipment = self.open_shipment()
+        response = self.benchmark('shipment-retrieve', lambda: self.get(f'/api/shipment/{shipment.id}/'))
+        self.assertEqual(response.json()['id'], shipment.id)
+
+    def test_shipment_retrieve_not_modified(self):
+        shipment = self.open_shipment()
+        etag = self.get(f'/api/shipment/{shipment.id}/')['ETag']
+        # Keep the response cache, which holds the generations the ETag is built from.
+        response = self.benchmark(
+            'shipment-retrieve-not-modified',
+            lambda: self.client.get(f'/api/shipment/{shipment.id}/', HTTP_IF_NONE_MATCH=etag),
+            reset=ContentType.objects.clear_cache,
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_shipment_assets(self):
+        shipment = self.open_shipment()
+        response = self.benchmark('shipment-assets', lambda: self.get(f'/api/shipment/{shipment.id}/assets/'))
+        self.assertEqual(response.json()['count'], Asset.objects.filter(root_shipment=shipment, depth=1).count())
+
+    def test_shipment_options(self):
+        self.benchmark('shipment-options', lambda: self.client.options('/api/shipment/'), reset=self.cold_options(ShipmentView))
+
+    def test_mark_shipment_packed(self):
+        shipment = self.open_shipment()
+        self.benchmark('shipment-mark-packed', lambda: self.get(f'/api/shipment/{shipment.id}/mark-shipment-packed/'))
+        self.assertEqual(len(Shipment.objects.get(id=shipment.id).packed_assets), Asset.objects.inside(shipment).count())
+
+    def test_shipment_receive(self):
+        shipment = self.open_shipment()
+        self.benchmark('shipment-receive', lambda: self.post(f'/api/shipment/{shipment.id}/receive/'))
+        self.assertFalse(Asset.objects.inside(shipment).exists())
+
+    def test_equipmenthold_list(self):
+        response = self.benchmark('equipmenthold-list', lambda: self.get('/api/equipmenthold/'))
+        self.assertEqual(
+            sum(len(hold['reservation_items']) for hold in response.json()['results']),
+            ReservationItem.objects.count(),
+        )
+
+    def test_equipmenthold_availability(self):
+        start_date = Reservation.objects.order_by('start_date').first().start_date
+        end_date = start_date + datetime.timedelta(days=365)
+        self.benchmark(
+            'equipmenthold-availability',
+            lambda: self.get(f'/api/equipmenthold/availability/?start_date={start_date}&end_date={end_date}'),
+        )
+
+    def test_equipmenthold_create(self):
+        payload = {
+            'title': 'Benchmark hold',
+            'start_date': '2000-01-01',
+            'end_date': '2000-01-14',
+            'reservation_items': [
+                {'model': model.id, 'quantity': 1}
+                for model in Model.objects.exclude(model_code__in=['MDC', 'ZPC'])
+            ],
+        }
+        self.benchmark('equipmenthold-create', lambda: self.post('/api/equipmenthold/', payload, status_code=201))
+
+    def test_scan(self):
+        shipment = self.open_shipment()
+        payload = {
+            'destination_content_type': 'shipment',
+            'destination_object_id': shipment.id,
+            'shipment': shipment.id,
+            'asset_code': self.loose_assets(1)[0].code,
+        }
+        self.benchmark('scan', lambda: self.post('/api/scan/', payload))
+        self.assertEqual(Asset.objects.get(code=payload['asset_code']).root_shipment_id, shipment.id)
+
+    def test_scan_batch(self):
+        shipment = self.open_shipment()
+        crate = Asset.objects.filter(root_shipment=shipment, depth=1, is_container=True).order_by('id').first()
+        payload = {
+            'destination_content_type': 'asset' if crate else 'shipment',
+            'destination_object_id': crate.id if crate else shipment.id,
+            'shipment': shipment.id,
+            'asset_codes': [asset.code for asset in self.loose_assets(25)],
+        }
+        self.benchmark('scan-batch', lambda: self.post('/api/scan/', payload))
+        self.assertEqual(Asset.objects.filter(code__in=payload['asset_codes'], root_shipment=shipment).count(), 25)
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-tests'}})
+class ReadTests(TestCase):
+    """
+    Sparse fieldsets, exports, conditional requests and the response cache.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            email='read@example.com', password='read', first_name='Read', last_name='Only'
+        )
+        icon = AssetIcon.objects.create(name='box', source_name='box')
+        cls.phone_model = Model.objects.create(name='Phone', manufacturer='Apple', model_code='IPF', icon=icon)
+        cls.warehouse = Location.objects.create(name='Warehouse', address_line_1='1 Main St', city='City', country='US', zipcode='1')
+        cls.shipment = Shipment.objects.create(origin=cls.warehouse, destination=cls.warehouse, carrier='Truck')
+        cls.phone = Asset.objects.create(code='IPF001', model=cls.phone_model, location=cls.warehouse)
+
+    def setUp(self):
+        get_response_cache().clear()
+        self.client.force_login(self.user)
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get('/api/model/?fields=id,model_code')
+        self.assertEqual(response.json()['results'], [{'id': self.phone_model.id, 'model_code': 'IPF'}])
+
+        response = self.client.get('/api/model/?exclude=description,icon')
+        self.assertEqual(
+            set(response.json()['results'][0]),
+            {'id', 'label', 'name', 'manufacturer', 'model_code'},
+        )
+
+    def test_csv_export(self):
+        response = self.client.get('/api/asset/export/?fields=code,model,parent_object_id')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(
+            b''.join(response.streaming_content).decode().splitlines(),
+            ['Code,Model,Parent object id', f'IPF001,{self.phone_model.id},'],
+        )
+
+    def test_xlsx_export(self):
+        response = self.client.get('/api/asset/export/?file_type=xlsx')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="asset-export.xlsx"')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+
+    def test_nested_write_changes_etag(self):
+        path = f'/api/shipment/{self.shipment.id}/'
+        etag = self.client.get(path)['ETag']
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phone.parent_object = self.shipment
+            self.phone.save()
+
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([asset['code'] for asset in response.json()['assets']], ['IPF001'])
+
+    def test_write_invalidates_cached_list(self):
+        self.assertEqual(self.client.get('/api/location/').json()['count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/location/', {
+                'name': 'Depot', 'address_line_1': '2 Main St', 'city': 'City', 'country': 'US', 'zipcode': '2',
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content[:500])
+
+        self.assertEqual(
+            [location['name'] for location in self.client.get('/api/location/').json()['results']],
+            ['Depot', 'Warehouse'],
+        )
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-tests'}})
+class BulkAssetTests(TestCase):
+    """
+    Sheet validation and writes of `/api/asset/bulk/`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            email='bulk@example.com', password='bulk', first_name='Bulk', last_name='Sheet'
+        )
+        icon = AssetIcon.objects.create(name='box', source_name='box')
+        cls.crate_model = Model.objects.create(name='Crate', manufacturer='Pelican', model_code='MDC', icon=icon)
+        cls.phone_model = Model.objects.create(name='Phone', manufacturer='Apple', model_code='IPF', icon=icon)
+        warehouse = Location.objects.create(name='Warehouse', address_line_1='1 Main St', city='City', country='US', zipcode='1')
+        cls.crate = Asset.objects.create(code='MDC001', model=cls.crate_model, is_container=True, location=warehouse)
+        cls.phone = Asset.objects.create(code='IPF001', model=cls.phone_model, location=warehouse)
+        cls.asset_type = ContentType.objects.get_for_model(Asset)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post(self, rows):
+        return self.client.post('/api/asset/bulk/?key=code', rows, content_type='application/json')
+
+    def phone_rows(self, count, parent):
+        return [
+            {'code': f'IPF{number:03}', 'model': self.phone_model.id, 'parent_content_type': self.asset_type.id, 'parent_object_id': parent.id}
+            for number in range(100, 100 + count)
+        ]
+
+    def test_every_error_in_one_response(self):
+        rows = self.phone_rows(2, self.crate)
+        rows[0]['parent_object_id'] = self.phone.id
+        rows[1]['parent_object_id'] = 0
+
+        response = self.post(rows + [None])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [(result['row'], result['errors']['non_field_errors']) for result in response.json()['results']],
+            [
+                (2, ['Only container assets can contain other assets.']),
+                (3, ['The parent object does not exist.']),
+                (4, ['Each row must be a JSON object. Instead row contained NoneType.']),
+            ],
+        )
+
+    def test_unique_codes_are_checked_normalized(self):
+        rows = self.phone_rows(2, self.crate)
+        rows[0]['code'] = f'{self.phone.code} '
+        rows[1]['code'] = ['IPF101']
+
+        response = self.post(rows)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [(result['row'], list(result['errors'])) for result in response.json()['results']],
+            [(2, ['code']), (3, ['code'])],
+        )
+        self.assertEqual(response.json()['results'][0]['errors']['code'], ['asset with this Code already exists.'])
+        self.assertEqual(Asset.objects.count(), 2)
+
+    def test_queries_independent_of_row_count(self):
+        def count_queries(rows):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(rows)
+            self.assertEqual(response.status_code, 200, response.content[:500])
+            Asset.objects.filter(code__in=[row['code'] for row in rows]).delete()
+            return len(queries)
+
+        self.assertEqual(count_queries(self.phone_rows(10, self.crate)), count_queries(self.phone_rows(40, self.crate)))
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-tests'}})
+class ScanTests(TestCase):
+    """
+    Batch scans of `/api/scan/`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            email='scan@example.com', password='scan', first_name='Scan', last_name='Batch'
+        )
+        icon = AssetIcon.objects.create(name='box', source_name='box')
+        crate_model = Model.objects.create(name='Crate', manufacturer='Pelican', model_code='MDC', icon=icon)
+        phone_model = Model.objects.create(name='Phone', manufacturer='Apple', model_code='IPF', icon=icon)
+        warehouse = Location.objects.create(name='Warehouse', address_line_1='1 Main St', city='City', country='US', zipcode='1')
+        cls.shipment = Shipment.objects.create(origin=warehouse, destination=warehouse, carrier='Truck')
+        shipment_type = ContentType.objects.get_for_model(Shipment)
+        cls.crate = Asset.objects.create(
+            code='MDC001', model=crate_model, is_container=True, location=warehouse,
+            parent_content_type=shipment_type, parent_object_id=cls.shipment.id,
+        )
+        cls.packed_phone = Asset.objects.create(
+            code='IPF001', model=phone_model, location=warehouse,
+            parent_content_type=shipment_type, parent_object_id=cls.shipment.id,
+        )
+        cls.phones = [Asset.objects.create(code=f'IPF{number:03}', model=phone_model, location=warehouse) for number in (2, 3)]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def scan(self, destination, asset_codes):
+        return self.client.post('/api/scan/', {
+            'destination_content_type': destination._meta.model_name,
+            'destination_object_id': destination.id,
+            'shipment': self.shipment.id,
+            'asset_codes': asset_codes,
+        }, content_type='application/json')
+
+    def test_results_per_code(self):
+        response = self.scan(self.crate, [self.phones[0].code, self.packed_phone.code, 'IPF999'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['accepted'], 1)
+        self.assertEqual([result['result'] for result in response.json()['results']], ['accepted', 'locked', 'unknown'])
+
+        self.phones[0].refresh_from_db()
+        self.assertEqual((self.phones[0].parent_object_id, self.phones[0].depth), (self.crate.id, 2))
+        self.assertEqual(self.phones[0].root_shipment_id, self.shipment.id)
+
+    def test_non_container_destination_is_rejected(self):
+        response = self.scan(self.packed_phone, [phone.code for phone in self.phones])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['accepted'], 0)
+        self.assertEqual(
+            [(result['result'], result['detail']) for result in response.json()['results']],
+            [('rejected', 'Only container assets can contain other assets.')] * 2,
+        )
+        self.assertFalse(Asset.objects.filter(parent_object_id=self.packed_phone.id, parent_content_type__model='asset').exists())
+
+    def test_websocket_session(self):
+        frames = [
+            {'type': 'websocket.connect'},
+            {'type': 'websocket.receive', 'text': json.dumps(
+                {'ref': 1, 'asset_code': self.phones[0].code, 'destination_content_type': 'asset', 'destination_object_id': self.packed_phone.id}
+            )},
+            {'type': 'websocket.receive', 'text': json.dumps(
+                {'ref': 2, 'asset_code': self.phones[0].code, 'destination_content_type': 'asset', 'destination_object_id': self.crate.id}
+            )},
+            {'type': 'websocket.disconnect'},
+        ]
+        sent = []
+
+        async def receive():
+            return frames.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        cookie = f'{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        scope = {'type': 'websocket', 'path': f'/ws/scan/{self.shipment.id}/', 'headers': [(b'cookie', cookie.encode())]}
+        async_to_sync(ScanSession())(scope, receive, send)
+
+        self.assertEqual(sent[0], {'type': 'websocket.accept'})
+        replies = [json.loads(message['text']) for message in sent[1:]]
+        self.assertEqual(
+            [(reply['type'], reply.get('ref')) for reply in replies],
+            [('session', None), ('ack', 1), ('ack', 2), ('diff', 2)],
+        )
+        self.assertEqual(replies[1]['results'][0]['result'], 'rejected')
+        self.assertEqual(replies[2]['results'][0]['result'], 'accepted')
+        self.assertEqual(
+            [(entry['parent'], entry['asset']['code']) for entry in replies[3]['assets']],
+            [(self.crate.id, self.phones[0].code)],
+        )
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-tests'}})
+class ReservationTests(TestCase):
+    """
+    Availability checks of `/api/equipmenthold/`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            email='hold@example.com', password='hold', first_name='Equipment', last_name='Hold'
+        )
+        icon = AssetIcon.objects.create(name='box', source_name='box')
+        cls.phone_model = Model.objects.create(name='Phone', manufacturer='Apple', model_code='IPF', icon=icon)
+        warehouse = Location.objects.create(name='Warehouse', address_line_1='1 Main St', city='City', country='US', zipcode='1')
+        cls.tablet_model = Model.objects.create(name='Tablet', manufacturer='Apple', model_code='IPD', icon=icon)
+        for number in range(3):
+            Asset.objects.create(code=f'IPF{number:03}', model=cls.phone_model, location=warehouse)
+        Asset.objects.create(code='IPD000', model=cls.tablet_model, location=warehouse)
+
+        cls.booked = Reservation.objects.create(title='Booked', start_date=datetime.date(2030, 1, 10), end_date=datetime.date(2030, 1, 20))
+        ReservationItem.objects.create(reservation=cls.booked, model=cls.phone_model, quantity=2)
+        cls.hold = Reservation.objects.create(title='Hold', start_date=datetime.date(2030, 2, 1), end_date=datetime.date(2030, 2, 5))
+        ReservationItem.objects.create(reservation=cls.hold, model=cls.phone_model, quantity=2)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def patch(self, reservation, data):
+        return self.client.patch(f'/api/equipmenthold/{reservation.id}/', data, content_type='application/json')
+
+    def dates(self, reservation):
+        return {'start_date': str(reservation.start_date), 'end_date': str(reservation.end_date)}
+
+    def test_date_change_is_checked_against_existing_items(self):
+        response = self.patch(self.hold, {'start_date': '2030-01-15', 'end_date': '2030-01-25'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('reservation_items', response.json())
+        self.hold.refresh_from_db()
+        self.assertEqual(self.hold.start_date, datetime.date(2030, 2, 1))
+
+        response = self.patch(self.hold, {'start_date': '2030-01-21', 'end_date': '2030-01-25'})
+        self.assertEqual(response.status_code, 200, response.content[:500])
+
+    def test_availability(self):
+        response = self.client.get(
+            f'/api/equipmenthold/availability/?start_date=2030-01-19&end_date=2030-01-22&model={self.phone_model.id}&exclude={self.hold.id}'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['models'], [{
+            'model': self.phone_model.id,
+            'stock': 3,
+            'reserved': [2, 2, 0, 0],
+            'available': [1, 1, 3, 3],
+            'min_available': 1,
+        }])
+
+    def test_items_are_diffed(self):
+        phone_item = self.hold.reservation_items.get()
+
+        response = self.patch(self.hold, {**self.dates(self.hold), 'reservation_items': [
+            {'model': self.phone_model.id, 'quantity': 1},
+            {'model': self.tablet_model.id, 'quantity': 1},
+        ]})
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        items = {item.model_id: item for item in self.hold.reservation_items.all()}
+        self.assertEqual((items[self.phone_model.id].pk, items[self.phone_model.id].quantity), (phone_item.pk, 1))
+        self.assertEqual(items[self.tablet_model.id].quantity, 1)
+
+        response = self.patch(self.hold, {**self.dates(self.hold), 'reservation_items': [{'model': self.tablet_model.id, 'quantity': 1}]})
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        self.assertEqual(list(self.hold.reservation_items.values_list('pk', flat=True)), [items[self.tablet_model.id].pk])
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-tests'}})
+class ChangeFeedTests(TestCase):
+    """
+    Subscriptions of the `/api/changes/` event stream.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            email='feed@example.com', password='feed', first_name='Change', last_name='Feed'
+        )
+        icon = AssetIcon.objects.create(name='box', source_name='box')
+        phone_model = Model.objects.create(name='Phone', manufacturer='Apple', model_code='IPF', icon=icon)
+        warehouse = Location.objects.create(name='Warehouse', address_line_1='1 Main St', city='City', country='US', zipcode='1')
+        cls.shipments = [Shipment.objects.create(origin=warehouse, destination=warehouse, carrier='Truck') for _ in range(2)]
+        cls.phone = Asset.objects.create(code='IPF001', model=phone_model, location=warehouse)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def read_events(self, query, count):
+        """
+        The data of the first `count` change events streamed for `query`.
+        """
+        response = self.client.get(f'/api/changes/?since=0&{query}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = iter(response.streaming_content)
+        self.assertTrue(next(stream).startswith(b'retry: '))
+        events = [next(stream).decode() for _ in range(count)]
+        response.close()
+
+        return [json.loads(event.split('data: ', 1)[1]) for event in events]
+
+    def test_subscriptions(self):
+        publish_changes(Asset, [self.phone], 'updated')
+        publish_changes(Shipment, self.shipments, 'updated')
+
+        self.assertEqual(
+            [(event['model'], event['id']) for event in self.read_events('model=asset,shipment', 3)],
+            [('asset', str(self.phone.id)), ('shipment', str(self.shipments[0].id)), ('shipment', str(self.shipments[1].id))],
+        )
+        self.assertEqual(
+            [(event['model'], event['id'], event['action']) for event in self.read_events(f'object=shipment:{self.shipments[1].id}', 1)],
+            [('shipment', str(self.shipments[1].id), 'updated')],
+        )
@@ -36,6 +36,7 @@ from .views import ScanView
 from .views import LogEntryView
 from .views import ObjectAdminLogEntries
 from .views import ReservationView
+from .views import ChangeFeedView
 
 router = DefaultRouter()
 
@@ -55,5 +56,6 @@ router.register(r"equipmenthold", ReservationView)
 urlpatterns = [
     path('current-user/', CurrentUserView.as_view(), name='current-user'),
     path('scan/', ScanView.as_view(), name='scan-api'),
+    path('changes/', ChangeFeedView.as_view(), name='change-feed'),
     path('logs/<int:object_contenttype_id>/<int:object_id>/', ObjectAdminLogEntries.as_view(), name='object-admin-log-entries')
 ] + router.urls
\ No newline at end of file
@@ -0,0 +1,200 @@
+from collections import defaultdict
+from django.core.exceptions import ValidationError
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+
+class PrefetchedQueryset:
+    """
+    Minimal stand-in for a related field's queryset that answers
+    `.get(pk=...)` from objects fetched up front.
+    """
+
+    def __init__(self, model, objects):
+        self.model = model
+        self.objects = {str(obj.pk): obj for obj in objects}
+
+    def get(self, pk):
+        if isinstance(pk, bool):
+            raise TypeError(pk)
+
+        try:
+            pk = self.model._meta.pk.to_python(pk)
+        except ValidationError:
+            raise ValueError(pk)
+
+        try:
+            return self.objects[str(pk)]
+        except KeyError:
+            raise self.model.DoesNotExist()
+
+
+class SheetValidator:
+    """
+    Validate a whole list of rows against a view's serializer using set-based
+    queries, collecting every error instead of stopping at the first one.
+
+    Related objects are resolved with one query per relation field, unique
+    fields are checked with one query per field, and duplicate values within
+    the payload are reported for unique fields and the view's
+    `duplicate_check_fields`. Row-level model rules come from the view's
+    `validate_rows` hook.
+    """
+
+    def __init__(self, view, rows, targets=None):
+        self.view = view
+        self.rows = rows
+        # Primary key of the existing object each row will update, if any.
+        self.targets = targets if targets is not None else [None] * len(rows)
+        self.row_errors = defaultdict(lambda: defaultdict(list))
+        self.validated_data = [None] * len(rows)
+
+    def is_valid(self):
+        serializer = self.view.get_serializer()
+
+        self.prefetch_relations(serializer)
+        unique_fields = self.strip_unique_validators(serializer)
+
+        # Field validation, one serializer instance for every row.
+        for index, row in enumerate(self.rows):
+            if not isinstance(row, dict):
+                self.row_errors[index]['non_field_errors'].append(
+                    f'Each row must be a JSON object. Instead row contained {type(row).__name__}.'
+                )
+                continue
+            try:
+                self.validated_data[index] = serializer.run_validation(row)
+            except serializers.ValidationError as e:
+                for field_name, messages in e.detail.items():
+                    self.row_errors[index][field_name].extend(messages)
+
+        self.check_duplicates(unique_fields)
+        self.check_unique(unique_fields)
+
+        # Model rules that need the validated values of every row.
+        rows = [(index, data) for index, data in enumerate(self.validated_data) if data is not None]
+        for index, errors in self.view.validate_rows(rows, self.targets).items():
+            for field_name, messages in errors.items():
+                self.row_errors[index][field_name].extend(messages)
+
+        for index in self.row_errors:
+            self.validated_data[index] = None
+
+        return not self.row_errors
+
+    @property
+    def errors(self):
+        return [
+            {'row': self.view.get_row_number(index), 'errors': dict(self.row_errors[index])}
+            for index in sorted(self.row_errors)
+        ]
+
+    def prefetch_relations(self, serializer):
+        """
+        Replace the queryset of every writable primary key relation with the
+        related objects referenced anywhere in the payload.
+        """
+        for field_name, field in serializer.fields.items():
+            if field.read_only:
+                continue
+
+            if isinstance(field, serializers.ManyRelatedField):
+                relation = field.child_relation
+                values = [
+                    value
+                    for row in self.rows if isinstance(row, dict) and isinstance(row.get(field_name), list)
+                    for value in row[field_name]
+                ]
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                relation = field
+                values = [row.get(field_name) for row in self.rows if isinstance(row, dict)]
+            else:
+                continue
+
+            queryset = relation.get_queryset()
+            if queryset is None:
+                continue
+
+            model = queryset.model
+            pks = set()
+            for value in values:
+                if value is None or value == '' or isinstance(value, bool):
+                    continue
+                try:
+                    pks.add(model._meta.pk.to_python(value))
+                except ValidationError:
+                    continue
+
+            relation.queryset = PrefetchedQueryset(model, queryset.filter(pk__in=pks) if pks else [])
+
+    def strip_unique_validators(self, serializer):
+        """
+        Remove per-row uniqueness queries and return the (field name, model
+        field) pairs they were checking.
+        """
+        unique_fields = []
+
+        for field_name, field in serializer.fields.items():
+            unique_validators = [validator for validator in field.validators if isinstance(validator, UniqueValidator)]
+            if unique_validators:
+                field.validators = [validator for validator in field.validators if not isinstance(validator, UniqueValidator)]
+                unique_fields.append((field_name, self.view.model._meta.get_field(field.source)))
+
+        return unique_fields
+
+    def check_duplicates(self, unique_fields):
+        """
+        Values that must be unique but appear on more than one row.
+        """
+        field_names = [field_name for field_name, _ in unique_fields]
+        field_names += [name for name in self.view.duplicate_check_fields if name not in field_names]
+
+        for field_name in field_names:
+            seen = defaultdict(list)
+            for index, row in enumerate(self.rows):
+                if not isinstance(row, dict):
+                    continue
+                value = row.get(field_name)
+                if value is None or str(value).strip() == '':
+                    continue
+                seen[str(value).strip()].append(index)
+
+            for value, indexes in seen.items():
+                if len(indexes) < 2:
+                    continue
+                for index in indexes:
+                    others = ', '.join(str(self.view.get_row_number(other)) for other in indexes if other != index)
+                    self.row_errors[index][field_name].append(f"Duplicate value '{value}' also used on row(s) {others}.")
+
+    def check_unique(self, unique_fields):
+        """
+        Values of unique fields that already belong to other objects. Only
+        the normalized values of rows that passed validation so far are
+        checked.
+        """
+        model = self.view.model
+
+        for field_name, model_field in unique_fields:
+            values = {
+                index : data[model_field.name]
+                for index, data in enumerate(self.validated_data)
+                if data is not None
+                and field_name not in self.row_errors.get(index, {})
+                and data.get(model_field.name) not in (None, '')
+            }
+            if not values:
+                continue
+
+            owners = dict(
+                model._default_manager
+                .filter(**{f"{model_field.name}__in": set(values.values())})
+                .values_list(model_field.name, 'pk')
+            )
+            message = model_field.error_messages['unique'] % {
+                'model_name': model._meta.verbose_name,
+                'field_label': model_field.verbose_name,
+            }
+
+            for index, value in values.items():
+                if value in owners and owners[value] != self.targets[index]:
+                    self.row_errors[index][field_name].append(message)
@@ -1,4 +1,10 @@
+import json
+from itertools import takewhile
 from django.db import transaction
+from django.db.models import Count
+from django.contrib.admin.models import LogEntry, CHANGE
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.decorators import action
@@ -7,19 +13,26 @@ from rest_framework.permissions import IsAuthenticated
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from api.exceptions import InvalidData
 from api.views.BaseView import BaseView
+from api.scan import get_scan_destination, scan_asset_codes
+from api.changes import publish_changes
+from api.cache import bump_generation
+from api.availability import get_model_availability, parse_availability_date
 from assets.models import Asset
 from assets.models import AssetIcon
 from assets.models import Model
 from assets.models import Location
 from assets.models import Shipment
 from assets.models import Reservation
+from assets.models import ReservationItem
 from api.serializers import AssetSerializer
 from api.serializers import AssetIconSerializer
 from api.serializers import ModelSerializer
 from api.serializers import LocationSerializer
 from api.serializers import ShipmentSerializer
 from api.serializers import ReservationSerializer
-from api.permissions import ScanToolPermission
+from api.serializers import content_tree_prefetch
+from api.serializers.assets_serializers import CONTENT_TREE_DEPTH
+from api.permissions import ScanToolPermission, ReceiveShipmentPermission
 from api.filters import AssetFilter, ReservationFilter, ShipmentFilter
 
 #       _                 _         _       _             __                     
@@ -29,14 +42,173 @@ from api.filters import AssetFilter, ReservationFilter, ShipmentFilter
 #   /_/   \_\___/___/\___|\__|___/ |_|_| |_|\__\___|_|  |_|  \__,_|\___\___||___/
 #                                                                                
 
-class AssetView(BaseView):
+class ContentTreeMixin:
+    """
+    Prefetches the nested `assets` contents only as deep as the request
+    serializes them.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        depth = self.get_content_tree_depth()
+
+        if depth:
+            queryset = queryset.prefetch_related(content_tree_prefetch(depth))
+
+        return queryset
+
+    def get_content_tree_depth(self):
+        if not self.is_field_requested('assets'):
+            return 0
+
+        expand = self.get_sparse_fieldset_kwargs().get('expand')
+        if expand is None:
+            return CONTENT_TREE_DEPTH + 1
+
+        return max(len(list(takewhile(lambda name: name == 'assets', path.split('.')))) for path in expand)
+
+class AssetView(ContentTreeMixin, BaseView):
     """
     Simple Viewset for Viewing Asset Information
     """
     model = Asset
-    queryset = model.objects.all()
+    queryset = model.objects.select_related('model')
+    response_dependencies = [Asset, Model]
     serializer_class = AssetSerializer
     filterset_class = AssetFilter
+    bulk_natural_keys = ['code']
+    bulk_update_fields = ['root_shipment', 'depth', 'path']
+    duplicate_check_fields = ['code', 'serial_number', 'imei', 'iccid']
+    count_group_fields = {
+        'model' : 'model',
+        'location' : 'location',
+        'condition' : 'condition',
+        'is_container' : 'is_container',
+        'parent_type' : 'parent_content_type__model',
+    }
+
+    def validate_rows(self, rows, targets):
+        errors = {}
+
+        # Verify the Asset Code starts with the Model Code, for every row at once.
+        for index, data in rows:
+            if not data['code'].startswith(data['model'].model_code):
+                errors[index] = {'code': ["Asset Codes must start with their Model's model_code."]}
+
+        # Containment rules of `Asset.clean()`, against parents loaded up front.
+        parent_keys = self.get_row_parent_keys(rows, targets)
+        self.bulk_parents = self.load_parents(parent_keys.values())
+
+        for index, (content_type_id, object_id) in parent_keys.items():
+            content_type = ContentType.objects.get_for_id(content_type_id) if content_type_id else None
+            try:
+                Asset.clean_parent(
+                    getattr(content_type, 'model', None),
+                    self.bulk_parents.get((content_type_id, object_id)),
+                    targets[index],
+                )
+            except ValidationError as e:
+                errors.setdefault(index, {}).setdefault('non_field_errors', []).extend(e.messages)
+
+        return errors
+
+    def get_row_parent_keys(self, rows, targets):
+        """
+        (parent content type id, parent object id) of every row. Updates that
+        leave the parent out keep the one they have.
+        """
+        keep_parent = [
+            targets[index] for index, data in rows
+            if targets[index] is not None and 'parent_content_type' not in data
+        ]
+        current = {
+            pk: (content_type_id, object_id)
+            for pk, content_type_id, object_id in Asset.objects.filter(pk__in=keep_parent).values_list(
+                'pk', 'parent_content_type', 'parent_object_id'
+            )
+        } if keep_parent else {}
+
+        parent_keys = {}
+        for index, data in rows:
+            if 'parent_content_type' in data:
+                content_type = data['parent_content_type']
+                parent_keys[index] = (getattr(content_type, 'pk', None), data.get('parent_object_id'))
+            else:
+                parent_keys[index] = current.get(targets[index], (None, None))
+
+        return parent_keys
+
+    def load_parents(self, parent_keys):
+        """
+        Parent objects by (content type id, object id), with one query per
+        parent content type.
+        """
+        object_ids = {}
+        for content_type_id, object_id in parent_keys:
+            if content_type_id is not None and object_id is not None:
+                object_ids.setdefault(content_type_id, set()).add(object_id)
+
+        parents = {}
+        for content_type_id, ids in object_ids.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            if model is None:
+                continue
+            for object_id, parent in model._default_manager.in_bulk(ids).items():
+                parents[(content_type_id, object_id)] = parent
+
+        return parents
+
+    def prepare_bulk_instance(self, instance):
+        # Attach the parent loaded by `validate_rows`, so neither `clean()`
+        # nor the containment below fetches it again.
+        if instance.parent_content_type_id is not None:
+            instance.parent_object = self.bulk_parents.get((instance.parent_content_type_id, instance.parent_object_id))
+
+        super().prepare_bulk_instance(instance)
+
+        instance._previous_containment = (instance.containment_prefix() if instance.pk else None, instance.depth)
+        instance.set_containment(instance.parent_object)
+
+    def perform_bulk_write(self, rows):
+        results = super().perform_bulk_write(rows)
+
+        # Carry the contents of any moved containers along with them.
+        for _, instance, created, _ in results:
+            if not created and instance.is_container:
+                instance.update_descendant_containment(*instance._previous_containment)
+
+        return results
+
+    @action(methods=['get'], detail=False, url_path="counts", url_name="counts")
+    def counts(self, request):
+        """
+        Return asset counts grouped by any combination of `model`, `location`,
+        `condition`, `is_container` and `parent_type`, computed with a single
+        GROUP BY over the filtered queryset.
+        """
+        group_by = [field for field in request.query_params.get('group_by', 'model').split(',') if field]
+        unknown_fields = [field for field in group_by if field not in self.count_group_fields]
+
+        if unknown_fields:
+            raise InvalidData(f"Cannot group assets by {', '.join(unknown_fields)}. Choose from {', '.join(self.count_group_fields)}.")
+
+        lookups = [self.count_group_fields[field] for field in group_by]
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).order_by()
+        rows = queryset.values(*lookups).annotate(count=Count('id')).order_by(*lookups)
+
+        results = [
+            {**{field: row[self.count_group_fields[field]] for field in group_by}, 'count': row['count']}
+            for row in rows
+        ]
+
+        return Response(
+            {
+                'group_by': group_by,
+                'total': sum(row['count'] for row in results),
+                'results': results,
+            },
+            status=status.HTTP_200_OK,
+        )
 
 class AssetIconView(BaseView):
     """
@@ -44,6 +216,7 @@ class AssetIconView(BaseView):
     """
     model = AssetIcon
     queryset = model.objects.all()
+    cache_responses = True
     serializer_class = AssetIconSerializer
 
 class ModelView(BaseView):
@@ -52,6 +225,7 @@ class ModelView(BaseView):
     """
     model = Model
     queryset = model.objects.all()
+    cache_responses = True
     serializer_class = ModelSerializer
 
 class LocationView(BaseView):
@@ -60,6 +234,7 @@ class LocationView(BaseView):
     """
     model = Location
     queryset = model.objects.all()
+    cache_responses = True
     serializer_class = LocationSerializer
 
 class ReservationView(BaseView):
@@ -67,19 +242,85 @@ class ReservationView(BaseView):
     Simple Viewset for Viewing Equipment Hold data
     """
     model = Reservation
-    queryset = model.objects.all()
+    queryset = model.objects.prefetch_related('reservation_items')
+    response_dependencies = [ReservationItem]
     serializer_class = ReservationSerializer
     filterset_class = ReservationFilter
 
-class ShipmentView(BaseView):
+    @action(methods=['get'], detail=False, url_path="availability", url_name="availability")
+    def availability(self, request):
+        """
+        Available quantity per model per day between `start_date` and
+        `end_date`. Optionally limited to `?model=1,2` and ignoring the holds
+        of `?exclude=<reservation id>`, e.g. the one being edited.
+        """
+        start_date = parse_availability_date(request.query_params.get('start_date'), 'start_date')
+        end_date = parse_availability_date(request.query_params.get('end_date'), 'end_date')
+
+        try:
+            model_ids = request.query_params.get('model')
+            model_ids = [int(pk) for pk in model_ids.split(',') if pk] if model_ids else None
+            exclude = request.query_params.get('exclude')
+            exclude = int(exclude) if exclude else None
+        except ValueError:
+            raise InvalidData("'model' and 'exclude' must be ids.")
+
+        availability = get_model_availability(start_date, end_date, model_ids=model_ids, exclude_reservation=exclude)
+
+        return Response(
+            {
+                'start_date': start_date,
+                'end_date': end_date,
+                'models': list(availability.values()),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+class ShipmentView(ContentTreeMixin, BaseView):
     """
     Simple Viewset for Viewing Shipment Information
     """
     model = Shipment
-    queryset = model.objects.all()
+    queryset = model.objects.select_related('origin', 'destination')
+    response_dependencies = [Asset, Location]
     serializer_class = ShipmentSerializer
     filterset_class = ShipmentFilter
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        # Packed asset snapshots can be large, skip loading them when unused.
+        if not self.is_field_requested('packed_assets'):
+            queryset = queryset.defer('packed_assets')
+
+        return queryset
+
+    @action(methods=['get'], detail=True, url_path="assets", url_name="assets")
+    def assets(self, request, pk=None):
+        """
+        Paginated list of the assets packed directly into a shipment, with
+        their nested contents.
+        """
+        try:
+            shipment = Shipment.objects.get(id=pk)
+        except self.model.DoesNotExist:
+            return Response(
+                {
+                    "error": f"{self.model.__name__} with id:{pk} does not exist."
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        queryset = shipment.assets.select_related('model').prefetch_related(content_tree_prefetch(CONTENT_TREE_DEPTH))
+        page = self.paginate_queryset(queryset)
+
+        if page is not None:
+            serializer = AssetSerializer(page, many=True, context=self.get_serializer_context(), **self.get_sparse_fieldset_kwargs())
+            return self.get_paginated_response(serializer.data)
+
+        serializer = AssetSerializer(queryset, many=True, context=self.get_serializer_context(), **self.get_sparse_fieldset_kwargs())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
     @action(methods=['get'], detail=True, url_path="mark-shipment-packed", url_name="mark_shipment_packed")
     def mark_shipment_packed(self, request, pk=None):
 
@@ -96,13 +337,9 @@ class ShipmentView(BaseView):
             ## Retrieve Shipment instance.
             shipment = self.get_queryset().get(id=pk)
 
-            ## Serialize Shipment Assets
-            assets = shipment.assets.all()
-            serialized_assets = AssetSerializer(assets, many=True)
-            
             ## Perform model updates
             shipment.status = 1 ## Set shipment status to 'Packed'
-            shipment.packed_assets = serialized_assets.data ## Update shipment packed_assets
+            shipment.packed_assets = shipment.build_packed_manifest() ## Snapshot shipment contents
             shipment.save()
             
             ## Serialize and return new modified object
@@ -126,6 +363,71 @@ class ShipmentView(BaseView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @action(methods=['post'], detail=True, url_path="receive", url_name="receive", permission_classes=[IsAuthenticated, ReceiveShipmentPermission])
+    def receive(self, request, pk=None):
+        """
+        Receive everything in a shipment at its destination. Every asset inside
+        it, crates and their contents alike, is detached and moved to the
+        destination with one UPDATE, and the shipment is marked Delivered
+        unless it was canceled.
+        """
+        try:
+            shipment = Shipment.objects.defer('packed_assets').get(id=pk)
+        except self.model.DoesNotExist:
+            return Response(
+                {
+                    "error": f"{self.model.__name__} with id:{pk} does not exist."
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        asset_content_type = ContentType.objects.get_for_model(Asset)
+        shipment_content_type = ContentType.objects.get_for_model(Shipment)
+
+        with transaction.atomic():
+            now = timezone.now()
+            received = list(Asset.objects.inside(shipment).select_related('model').only('id', 'code', 'model__name'))
+            Asset.objects.inside(shipment).detach(location=shipment.destination_id, modified_by=request.user, last_modified=now)
+
+            log_entries = [
+                LogEntry(
+                    user_id=request.user.id,
+                    content_type_id=asset_content_type.id,
+                    object_id=str(asset.pk),
+                    object_repr=repr(asset)[:200],
+                    action_flag=CHANGE,
+                    change_message=json.dumps([{"changed": {"fields": ["location", "parent_content_type", "parent_object_id"]}}]),
+                )
+                for asset in received
+            ]
+
+            if shipment.status != 4: ## Canceled shipments stay canceled
+                shipment.status = 3 ## Set shipment status to 'Delivered'
+                shipment.save()
+                log_entries.append(
+                    LogEntry(
+                        user_id=request.user.id,
+                        content_type_id=shipment_content_type.id,
+                        object_id=str(shipment.pk),
+                        object_repr=repr(shipment)[:200],
+                        action_flag=CHANGE,
+                        change_message=json.dumps([{"changed": {"fields": ["status"]}}]),
+                    )
+                )
+                publish_changes(Shipment, [shipment], 'updated')
+
+            LogEntry.objects.bulk_create(log_entries, batch_size=500)
+
+            for asset in received:
+                asset.last_modified = now
+            publish_changes(Asset, received, 'updated')
+
+            # Bulk queries don't send model signals.
+            bump_generation(Asset, LogEntry)
+
+        payload = self.get_serializer(instance=shipment).data
+        return Response(payload, status=status.HTTP_200_OK)
+
 class ScanView(APIView):
     """
     Simple View for entering assets into shipments/container assets.
@@ -142,6 +444,10 @@ class ScanView(APIView):
 
     def post(self, request):
 
+        # Batch mode: several asset codes scanned into one destination.
+        if 'asset_codes' in request.data:
+            return self.post_batch(request)
+
         # Validate request data
         try:
             assert 'destination_content_type' in request.data
@@ -192,7 +498,11 @@ class ScanView(APIView):
                     entry.clean() # Perform Model Validation
 
                     try:
-                        entry.save() # Perform Save
+                        with transaction.atomic():
+                            entry.save() # Perform Save
+                            publish_changes(Asset, [entry], 'updated')
+                            publish_changes(Shipment, [shipment], 'updated')
+
                         serializer = AssetSerializer(entry)
 
                         return Response(serializer.data)
@@ -209,3 +519,43 @@ class ScanView(APIView):
         else:
             # Unknown Destination Content Type
             raise InvalidData("The provided destination content-type is not permitted.")
+
+    def post_batch(self, request):
+        """
+        Scan a list of asset codes into a single destination, returning a
+        result for each submitted code. See `api.scan.scan_asset_codes`.
+        """
+
+        # Validate request data
+        try:
+            assert 'destination_content_type' in request.data
+            assert 'destination_object_id' in request.data
+            assert 'shipment' in request.data
+            assert isinstance(request.data['asset_codes'], list)
+        except AssertionError:
+            raise InvalidData()
+
+        # Retrieve Shipment and Destination Objects
+        try:
+            shipment = Shipment.objects.get(id=request.data['shipment'])
+        except ObjectDoesNotExist:
+            raise InvalidData(f"A shipment with id '{request.data['shipment']}' does not exist.")
+
+        destination_object = get_scan_destination(
+            shipment,
+            request.data['destination_content_type'],
+            request.data['destination_object_id'],
+        )
+        destination_content_type = ContentType.objects.get_for_model(destination_object.__class__)
+
+        results, accepted, notices = scan_asset_codes(shipment, destination_object, request.data['asset_codes'])
+
+        return Response(
+            {
+                'destination_content_type': destination_content_type.model,
+                'destination_object_id': destination_object.id,
+                'accepted': sum(1 for result in results if result['result'] == 'accepted'),
+                'results': results,
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -1,5 +1,14 @@
-from django.db import transaction
-from django.db.models import ProtectedError
+import csv
+import datetime
+import hashlib
+import json
+import tempfile
+from django.db import connection, transaction
+from django.db.models import Count, Max, ProtectedError
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+from django.utils import timezone
 from django.utils.encoding import force_str
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.contrib.auth.models import Permission
@@ -15,9 +24,14 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework.utils.field_mapping import ClassLookupDict
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated, IsAdminUser
 from ..serializers import ContentAssetsField, ReservationItemSerializer
 from ..exceptions import InvalidData
+from ..validators import SheetValidator
+from ..cache import bump_generation, get_generations, get_response_cache, response_cache_key
+from ..changes import publish_changes
+from ..database import reading_from_replica
 
 SERIALIZER_FIELD_LABEL_LOOKUP = ClassLookupDict({
         serializers.Field: 'field',
@@ -50,8 +64,281 @@ SERIALIZER_FIELD_LABEL_LOOKUP = ClassLookupDict({
 
     })
 
+# OPTIONS metadata shared by all model views
+class OptionsMetadataMixin:
+
+    serializer_field_label_lookup = SERIALIZER_FIELD_LABEL_LOOKUP
+
+    def options(self, request, *args, **kwargs):
+        """
+        Don't include the view description in OPTIONS responses.
+
+        Field metadata only depends on the viewset class, so it is built once
+        and reused. The only per-user part is the model permissions, which
+        are appended to the cached metadata on every request.
+        """
+        metadata = self.get_options_metadata(request)
+        permissions = self.get_options_permissions(request)
+
+        etag = '"{}-{}"'.format(
+            metadata['version'],
+            ''.join('1' if permissions[perm] else '0' for perm in sorted(permissions))
+        )
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+        if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = {**metadata, 'permissions': permissions}
+
+        return Response(data=data, status=status.HTTP_200_OK, headers=headers)
+
+    def get_options_metadata(self, request):
+        """
+        Return the cached OPTIONS metadata of this viewset class, building it
+        on first use.
+        """
+        view_class = type(self)
+        metadata = view_class.__dict__.get('_options_metadata')
+
+        if metadata is None:
+            metadata = self.build_options_metadata(request)
+            metadata['version'] = hashlib.sha1(
+                json.dumps(metadata, sort_keys=True, default=str).encode()
+            ).hexdigest()[:16]
+            view_class._options_metadata = metadata
+
+        return metadata
+
+    def get_options_permissions(self, request):
+        """
+        Which of the standard model permissions the requesting user holds.
+        """
+        opts = self.model._meta
+        return {
+            action: request.user.has_perm(f"{opts.app_label}.{action}_{opts.model_name}")
+            for action in ('view', 'add', 'change', 'delete')
+        }
+
+    def build_options_metadata(self, request):
+        """
+        Build the user-independent part of the OPTIONS response.
+        """
+        data = self.metadata_class().determine_metadata(request, self)
+        data['model'] = self.model.__name__.lower()
+        data['contenttype_id'] = ContentType.objects.get_for_model(self.model).id
+        data['actions'] = None
+
+        _fields = self.model._meta.get_fields()
+        # If user has appropriate permissions for the view, include
+        # appropriate metadata about the fields that should be supplied.
+        serializer = self.get_serializer()
+        if hasattr(serializer, 'child'):
+            # If this is a `ListSerializer` then we want to examine the
+            # underlying child serializer instance instead.
+            serializer = serializer.child
+
+        data['model_fields'] = { 
+            field_name: self.get_field_info(field)
+            for field_name, field in serializer.fields.items()
+            if not isinstance(field, serializers.HiddenField)
+        }
+
+        for field in _fields:
+            if field.related_model and field.name in data['model_fields']:
+                data['model_fields'][field.name] = {**data['model_fields'][field.name], 'related_model_name': field.related_model.__name__.lower() }
+
+        return data
+    
+    def get_field_info(self, field):
+        """
+        Given an instance of a serializer field, return a dictionary
+        of metadata about it.
+        """
+        field_info = {
+            "type": self.serializer_field_label_lookup[field],
+            "required": getattr(field, "required", False),
+        }
+
+        attrs = [
+            'read_only', 'label', 'help_text',
+            'min_length', 'max_length',
+            'min_value', 'max_value',
+            'max_digits', 'decimal_places',
+        ]
+
+        for attr in attrs:
+            value = getattr(field, attr, None)
+            if value is not None and value != '':
+                field_info[attr] = force_str(value, strings_only=True)
+
+        if getattr(field, 'child', None):
+            field_info['child'] = self.get_field_info(field.child)
+
+        ## FIXME: I Removed this because it wasn't working and I didn't know what it did. Was causing issues with option requests to /api/assets.
+        # elif getattr(field, 'fields', None):
+        #     print(field)
+        #     print(getattr(field, 'fields', None))
+        #     field_info['children'] = self.get_serializer_info(field)
+
+        if (not field_info.get('read_only') and
+            not isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)) and
+                hasattr(field, 'choices')):
+            field_info['choices'] = [
+                {
+                    'value': choice_value,
+                    'display_name': force_str(choice_name, strings_only=True)
+                }
+                for choice_value, choice_name in field.choices.items()
+            ]
+
+        return field_info
+
+# Conditional and cached list/retrieve shared by all model views
+class CachedReadMixin:
+
+    # Models whose rows are nested into this view's responses. Their changes
+    # also invalidate conditional GET validators and cached responses.
+    response_dependencies = []
+    # Cache list/retrieve responses until a write bumps one of their models.
+    cache_responses = False
+    response_cache_timeout = 60 * 15
+
+    def list(self, request, *args, **kwargs):
+
+        def build():
+            queryset = self.filter_queryset(self.get_queryset())
+            validators = self.get_conditional_validators([self.get_conditional_stats(queryset)])
+
+            def render():
+                page = self.paginate_queryset(queryset)
+                if page is not None:
+                    serializer = self.get_serializer(page, many=True)
+                    return self.get_paginated_response(serializer.data).data
+
+                return self.get_serializer(queryset, many=True).data
+
+            return validators, render
+
+        return self.get_cached_response(request, build)
+
+    def retrieve(self, request, pk=None):
+
+        def build():
+            _model_instance = self.get_queryset().get(id=pk)
+            validators = self.get_conditional_validators(
+                [(getattr(_model_instance, 'last_modified', None), 1)]
+            )
+
+            return validators, lambda: self.get_serializer(_model_instance).data
+
+        try:
+            return self.get_cached_response(request, build)
+
+        except self.model.DoesNotExist as e:
+            return Response({"error" : f"{self.model.__name__} with id:{pk} does not exist."}, status=status.HTTP_404_NOT_FOUND)
+
+    def get_cached_response(self, request, build):
+        """
+        Serve a read from the response cache, or build it with `build`, which
+        returns the conditional validators and a callable rendering the data.
+        Matching conditional requests get a 304 before anything is rendered.
+        """
+        cache_key = None
+        entry = None
+
+        if self.cache_responses:
+            cache_key = response_cache_key(self, request, [self.model, *self.response_dependencies])
+            entry = get_response_cache().get(cache_key)
+
+        if entry is None:
+            (etag, last_modified), render = build()
+
+            not_modified = self.get_not_modified_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+
+            entry = {'data': render(), 'etag': etag, 'last_modified': last_modified}
+            if cache_key is not None:
+                get_response_cache().set(cache_key, entry, self.response_cache_timeout)
+
+        else:
+            not_modified = self.get_not_modified_response(request, entry['etag'], entry['last_modified'])
+            if not_modified is not None:
+                return not_modified
+
+        response = Response(entry['data'], status=status.HTTP_200_OK)
+        return self.set_conditional_headers(response, entry['etag'], entry['last_modified'])
+
+    def invalidate_response_cache(self):
+        bump_generation(self.model)
+
+    def supports_conditional_requests(self):
+        return any(field.name == 'last_modified' for field in self.model._meta.concrete_fields)
+
+    def get_conditional_stats(self, queryset):
+        """
+        (MAX(last_modified), COUNT(*)) of a queryset with one aggregate query.
+        """
+        if not self.supports_conditional_requests():
+            return (None, None)
+
+        stats = queryset.order_by().aggregate(latest=Max('last_modified'), count=Count('pk'))
+        return (stats['latest'], stats['count'])
+
+    def get_conditional_validators(self, stats):
+        """
+        ETag and Last-Modified for a response built from rows summarised by
+        `stats` and the request's query string.
+
+        Changes to the view's dependencies enter the ETag through their
+        response cache generations rather than table-wide aggregates, so only
+        the ETag, not Last-Modified, reflects them.
+        """
+        if not self.supports_conditional_requests():
+            return None, None
+
+        timestamps = [latest for latest, _ in stats if latest is not None]
+        last_modified = max(timestamps) if timestamps else None
+
+        parts = [self.model._meta.label, urlencode(sorted(self.request.query_params.lists()), doseq=True)]
+        parts += [f"{latest.isoformat() if latest else ''}:{count}" for latest, count in stats]
+        if self.response_dependencies:
+            parts += get_generations(self.response_dependencies)
+
+        etag = '"{}"'.format(hashlib.sha1('|'.join(parts).encode()).hexdigest())
+        return etag, last_modified
+
+    def get_not_modified_response(self, request, etag, last_modified):
+        """
+        A 304 response when the client's cached copy is still current.
+        """
+        if etag is None:
+            return None
+
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if response is not None:
+            self.set_conditional_headers(response, etag, last_modified)
+
+        return response
+
+    def set_conditional_headers(self, response, etag, last_modified):
+        if etag is not None:
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+
+        return response
+
 # Standard Functionality for all views to share
-class BaseView(viewsets.GenericViewSet, 
+class BaseView(OptionsMetadataMixin,
+    CachedReadMixin,
+    viewsets.GenericViewSet, 
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -65,8 +352,54 @@ class BaseView(viewsets.GenericViewSet,
 
         super().__init__(*args, **kwargs)
 
-    serializer_field_label_lookup = SERIALIZER_FIELD_LABEL_LOOKUP
-    
+    def dispatch(self, request, *args, **kwargs):
+        # Safe requests may read from the read-only connection, see `api.database`.
+        with reading_from_replica(request.method in SAFE_METHODS):
+            return super().dispatch(request, *args, **kwargs)
+
+    # Fields besides 'id' that identify an existing object in bulk writes.
+    bulk_natural_keys = []
+    # Fields that should not repeat within one imported sheet.
+    duplicate_check_fields = []
+    # Fields maintained by `prepare_bulk_instance` that bulk updates must write.
+    bulk_update_fields = []
+    bulk_batch_size = 500
+    export_chunk_size = 2000
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_sparse_fieldset_kwargs())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_sparse_fieldset_kwargs(self):
+        """
+        `?fields=`, `?exclude=` and `?expand=` of read requests, as serializer
+        keyword arguments.
+        """
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET':
+            return {}
+
+        return {
+            param: [name for name in request.query_params[param].split(',') if name]
+            for param in ('fields', 'exclude', 'expand')
+            if param in request.query_params
+        }
+
+    def is_field_requested(self, field_name):
+        """
+        Whether a serializer field survives the request's sparse fieldset.
+        """
+        sparse = self.get_sparse_fieldset_kwargs()
+
+        if 'fields' in sparse and field_name not in sparse['fields']:
+            return False
+        if field_name in sparse.get('exclude', []):
+            return False
+        if 'expand' in sparse and field_name in getattr(self.get_serializer_class().Meta, 'expandable_fields', []):
+            return field_name in {path.split('.')[0] for path in sparse['expand']}
+
+        return True
+
     def create(self, request, *args, **kwargs):
 
         serializer = self.get_serializer(data=request.data)
@@ -89,7 +422,7 @@ class BaseView(viewsets.GenericViewSet,
             else:
                 instance = serializer.save()
 
-            instance_content_type = ContentType.objects.get(model=instance.__class__.__name__.lower())
+            instance_content_type = ContentType.objects.get_for_model(instance.__class__)
 
             # FIXME: Deprecated, use LogEntryManager.log_actions()
             LogEntry.objects.log_action(
@@ -101,6 +434,9 @@ class BaseView(viewsets.GenericViewSet,
                 change_message=[{"added": {}}]
             )
 
+            publish_changes(instance.__class__, [instance], 'created')
+            self.invalidate_response_cache()
+
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
@@ -123,7 +459,7 @@ class BaseView(viewsets.GenericViewSet,
         for field in serializer.instance.__class__._meta.get_fields():
             change_map[field.name] = (getattr(serializer.instance, field.name, None), )
 
-        instance_content_type = ContentType.objects.get(model=serializer.instance.__class__.__name__.lower())
+        instance_content_type = ContentType.objects.get_for_model(serializer.instance.__class__)
 
         for field in serializer.instance.__class__._meta.get_fields():
             change_map[field.name] = (change_map[field.name][0], getattr(serializer.instance, field.name, None))
@@ -143,6 +479,9 @@ class BaseView(viewsets.GenericViewSet,
                 change_message=[{"changed": {"fields" : changed_fields}}]
             )
 
+            publish_changes(serializer.instance.__class__, [serializer.instance], 'updated')
+            self.invalidate_response_cache()
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         self.perform_destroy(instance, request)
@@ -153,7 +492,8 @@ class BaseView(viewsets.GenericViewSet,
 
         with transaction.atomic():
             
-            instance_content_type = ContentType.objects.get(model=instance.__class__.__name__.lower())
+            instance_content_type = ContentType.objects.get_for_model(instance.__class__)
+            instance_id = instance.pk # Cleared by delete()
             
             try:
                 payload = instance.delete()
@@ -161,7 +501,7 @@ class BaseView(viewsets.GenericViewSet,
                 LogEntry.objects.log_action(
                     request.user.id,
                     instance_content_type.id,
-                    instance.id,
+                    instance_id,
                     repr(instance),
                     DELETION,
                 )
@@ -169,119 +509,384 @@ class BaseView(viewsets.GenericViewSet,
             except ProtectedError as e:
                 raise InvalidData(e)
 
-            
+            instance.pk = instance_id
+            publish_changes(instance.__class__, [instance], 'deleted')
+            self.invalidate_response_cache()
 
-    def retrieve(self, request, pk=None):
-        try:
-            _model_instance = self.get_queryset().get(id=pk)
-            serializer = self.get_serializer_class()(_model_instance)
+    @action(detail=False, methods=['post'])
+    def validate(self, request):
+
+        data = request.data
         
-        except self.model.DoesNotExist as e:
-            return Response({"error" : f"{self.model.__name__} with id:{pk} does not exist."}, status=status.HTTP_404_NOT_FOUND)
+        # Verify single object
+        if (type(data) is dict):
+            serializer = self.get_serializer(data=data)
+            serializer.is_valid(raise_exception=True)
+
+            return Response(status=status.HTTP_200_OK)
+
+        # Verify multiple objects, reporting every row error at once.
+        if (type(data) is list):
+
+            key = self.get_bulk_key(request)
+            existing = self.get_bulk_existing(data, key)
+            validator = SheetValidator(self, data, targets=self.get_bulk_targets(data, key, existing))
+
+            if not validator.is_valid():
+                return Response({'results': validator.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            return Response(status=status.HTTP_200_OK)
         
-        else:
-            return Response(serializer.data, status=status.HTTP_200_OK)
+        raise InvalidData(f'Request body must contain JSON array or Object. Instead body contained {type(data)}')
 
-    def options(self, request, *args, **kwargs):
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
         """
-        Don't include the view description in OPTIONS responses.
+        Create or update many objects in one transaction.
+
+        The body is a list of objects. Rows whose upsert key (`?key=`, 'id' by
+        default or one of `bulk_natural_keys`) matches an existing object are
+        updated, the rest are created. Every row is validated before anything
+        is written, and a result is returned for each row.
         """
-        data = self.metadata_class().determine_metadata(request, self)
-        data['model'] = self.model.__name__.lower()
-        data['contenttype_id'] = ContentType.objects.get(model=data['model']).id
-        data['actions'] = None
+        data = request.data
 
-        _fields = self.model._meta.get_fields()
-        # If user has appropriate permissions for the view, include
-        # appropriate metadata about the fields that should be supplied.
-        serializer = self.get_serializer()
-        if hasattr(serializer, 'child'):
-            # If this is a `ListSerializer` then we want to examine the
-            # underlying child serializer instance instead.
-            serializer = serializer.child
+        if type(data) is not list:
+            raise InvalidData(f'Request body must contain a JSON array. Instead body contained {type(data)}')
 
-        data['model_fields'] = { 
-            field_name: self.get_field_info(field)
-            for field_name, field in serializer.fields.items()
-            if not isinstance(field, serializers.HiddenField)
-        }
+        key = self.get_bulk_key(request)
+        existing = self.get_bulk_existing(data, key)
+        targets = self.get_bulk_targets(data, key, existing)
 
-        for field in _fields:
-            if field.related_model and field.name in data['model_fields']:
-                data['model_fields'][field.name] = {**data['model_fields'][field.name], 'related_model_name': field.related_model.__name__.lower() }
+        if any(target is not None for target in targets):
+            opts = self.model._meta
+            if not request.user.has_perm(f"{opts.app_label}.change_{opts.model_name}"):
+                raise PermissionDenied()
 
-        return Response(data=data, status=status.HTTP_200_OK)
-    
-    def get_field_info(self, field):
+        # Validate every row before writing anything.
+        validator = SheetValidator(self, data, targets=targets)
+
+        if not validator.is_valid():
+            return Response({'results': validator.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        fast_path = self.supports_bulk_writes()
+        rows, errors = [], []
+
+        for index, row in enumerate(data):
+            instance = existing.get(str(row.get(key)))
+
+            if not fast_path:
+                rows.append((index, row, instance))
+                continue
+
+            instance, changed_fields = self.build_bulk_instance(validator.validated_data[index], instance, request)
+
+            try:
+                self.prepare_bulk_instance(instance)
+            except ValidationError as e:
+                errors.append({'row': self.get_row_number(index), 'errors': {'non_field_errors': e.messages}})
+                continue
+
+            rows.append((index, instance, instance.pk is None, changed_fields))
+
+        if errors:
+            return Response({'results': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if fast_path:
+                results = self.perform_bulk_write(rows)
+            else:
+                results = self.perform_serial_write(rows, request)
+
+            instance_content_type = ContentType.objects.get_for_model(self.model)
+            LogEntry.objects.bulk_create(
+                [
+                    LogEntry(
+                        user_id=request.user.id,
+                        content_type_id=instance_content_type.id,
+                        object_id=str(instance.pk),
+                        object_repr=repr(instance)[:200],
+                        action_flag=ADDITION if created else CHANGE,
+                        change_message=json.dumps([{"added": {}}] if created else [{"changed": {"fields": changed_fields}}]),
+                    )
+                    for _, instance, created, changed_fields in results
+                ],
+                batch_size=self.bulk_batch_size,
+            )
+
+            publish_changes(self.model, [instance for _, instance, created, _ in results if created], 'created')
+            publish_changes(self.model, [instance for _, instance, created, _ in results if not created], 'updated')
+
+            # Bulk queries don't send model signals.
+            self.invalidate_response_cache()
+            bump_generation(LogEntry)
+
+        return Response(
+            {
+                'results': [
+                    {'row': self.get_row_number(index), 'result': 'created' if created else 'updated', 'id': instance.pk}
+                    for index, instance, created, _ in results
+                ]
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def get_bulk_key(self, request):
         """
-        Given an instance of a serializer field, return a dictionary
-        of metadata about it.
+        The field used to match payload rows to existing objects.
         """
-        field_info = {
-            "type": self.serializer_field_label_lookup[field],
-            "required": getattr(field, "required", False),
+        key = request.query_params.get('key', 'id')
+
+        if key != 'id' and key not in self.bulk_natural_keys:
+            raise InvalidData(f"'{key}' cannot be used as an upsert key for {self.model.__name__} objects.")
+
+        return key
+
+    def get_bulk_existing(self, data, key):
+        """
+        Resolve the existing objects referenced by a payload with one query.
+        Rows are only matched by key here, so the view's queryset and its
+        prefetches aren't used.
+        """
+        lookup_values = set()
+        for row in data:
+            if isinstance(row, dict) and row.get(key) not in (None, ''):
+                try:
+                    lookup_values.add(self.model._meta.get_field(key).to_python(row[key]))
+                except ValidationError:
+                    continue
+
+        if not lookup_values:
+            return {}
+
+        return {
+            str(getattr(instance, key)) : instance
+            for instance in self.model._default_manager.filter(**{f"{key}__in": lookup_values})
         }
 
-        attrs = [
-            'read_only', 'label', 'help_text',
-            'min_length', 'max_length',
-            'min_value', 'max_value',
-            'max_digits', 'decimal_places',
+    def get_bulk_targets(self, data, key, existing):
+        """
+        Primary key of the existing object each row updates, or None.
+        """
+        return [
+            getattr(existing.get(str(row.get(key))), 'pk', None) if isinstance(row, dict) else None
+            for row in data
         ]
 
-        for attr in attrs:
-            value = getattr(field, attr, None)
-            if value is not None and value != '':
-                field_info[attr] = force_str(value, strings_only=True)
+    def validate_rows(self, rows, targets):
+        """
+        Model rules checked across every validated row of a sheet. Receives
+        (index, validated_data) pairs and the primary key of the object each
+        row updates (or None) by index, and returns {index: {field: [errors]}}.
+        """
+        return {}
 
-        if getattr(field, 'child', None):
-            field_info['child'] = self.get_field_info(field.child)
+    def get_row_number(self, index):
+        # Increment by 1 because spreadsheet rows use 1-based indexes.
+        # Increment by 1 because the first row (header row) is not expected.
+        return index + 1 + 1
 
-        ## FIXME: I Removed this because it wasn't working and I didn't know what it did. Was causing issues with option requests to /api/assets.
-        # elif getattr(field, 'fields', None):
-        #     print(field)
-        #     print(getattr(field, 'fields', None))
-        #     field_info['children'] = self.get_serializer_info(field)
+    def supports_bulk_writes(self):
+        """
+        Objects can be written with bulk queries when the serializer uses the
+        default ModelSerializer writes and has no writable many-to-many fields.
+        """
+        serializer_class = self.get_serializer_class()
 
-        if (not field_info.get('read_only') and
-            not isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)) and
-                hasattr(field, 'choices')):
-            field_info['choices'] = [
-                {
-                    'value': choice_value,
-                    'display_name': force_str(choice_name, strings_only=True)
-                }
-                for choice_value, choice_name in field.choices.items()
+        if serializer_class.create is not serializers.ModelSerializer.create:
+            return False
+        if serializer_class.update is not serializers.ModelSerializer.update:
+            return False
+        if not connection.features.can_return_rows_from_bulk_insert:
+            return False
+
+        many_to_many = {field.name for field in self.model._meta.many_to_many}
+        writable_fields = {name for name, field in serializer_class().fields.items() if not field.read_only}
+
+        return not (many_to_many & writable_fields)
+
+    def build_bulk_instance(self, validated_data, instance, request):
+        """
+        Apply a validated row to a new or existing (unsaved) model instance.
+        Returns the instance and the names of the fields that changed.
+        """
+        if instance is None:
+            instance = self.model(**validated_data)
+            if hasattr(instance, 'created_by_id'):
+                instance.created_by = request.user
+            return instance, list(validated_data)
+
+        changed_fields = []
+        for attr, value in validated_data.items():
+            field = self.model._meta.get_field(attr)
+
+            # Compare foreign keys by id to avoid fetching the related object.
+            if field.many_to_one:
+                changed = getattr(instance, field.attname) != getattr(value, 'pk', value)
+            else:
+                changed = getattr(instance, attr) != value
+
+            if changed:
+                changed_fields.append(attr)
+            setattr(instance, attr, value)
+
+        return instance, changed_fields
+
+    def prepare_bulk_instance(self, instance):
+        """
+        Model validation normally performed on save, run before bulk writes.
+        """
+        instance.clean()
+
+    def perform_bulk_write(self, rows):
+        """
+        Write validated rows with chunked bulk_create and bulk_update queries.
+        Receives and returns (index, instance, created, changed_fields) rows.
+        """
+        creates = [instance for _, instance, created, _ in rows if created]
+        updates = [instance for _, instance, created, _ in rows if not created]
+
+        self.model.objects.bulk_create(creates, batch_size=self.bulk_batch_size)
+
+        if updates:
+            now = timezone.now()
+            auto_now_fields = [
+                field.name for field in self.model._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
             ]
+            for instance in updates:
+                for field_name in auto_now_fields:
+                    setattr(instance, field_name, now)
 
-        return field_info
+            update_fields = set(auto_now_fields) | set(self.bulk_update_fields)
+            for _, _, created, changed_fields in rows:
+                if not created:
+                    update_fields.update(changed_fields)
 
-    @action(detail=False, methods=['post'])
-    def validate(self, request):
+            self.model.objects.bulk_update(updates, list(update_fields), batch_size=self.bulk_batch_size)
 
-        data = request.data
-        
-        # Verify single object
-        if (type(data) is dict):
-            serializer = self.get_serializer(data=data)
+        return rows
+
+    def perform_serial_write(self, rows, request):
+        """
+        Save validated rows one at a time through their serializers, for
+        serializers with custom create/update logic.
+        """
+        serializerFields = self.get_serializer_class()().get_fields()
+        results = []
+
+        for index, row, instance in rows:
+            serializer = self.get_serializer(instance, data=row)
             serializer.is_valid(raise_exception=True)
 
-            return Response(status=status.HTTP_200_OK)
+            created = instance is None
+            changed_fields = list(serializer.validated_data)
 
-        # Verify multiple objects
-        if (type(data) is list):
+            if created and 'created_by' in serializerFields and 'modified_by' in serializerFields:
+                instance = serializer.save(created_by=request.user, modified_by=None)
+            else:
+                instance = serializer.save()
 
-            for obj in data:
-                serializer = self.get_serializer(data=obj)
-                if not serializer.is_valid():
-                    # Increment by 1 because spreadsheet rows use 1-based indexes.
-                    # Increment by 1 because the first row (header row) is not expected.
-                    row_number = data.index(obj) + 1 + 1 
+            results.append((index, instance, created, changed_fields))
 
-                    issues = {'row': row_number, 'errors': serializer.errors}
+        return results
 
-                    return Response(issues, status=status.HTTP_400_BAD_REQUEST)
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream the filtered queryset as a CSV or XLSX file.
 
-            return Response(status=status.HTTP_200_OK)
-        
-        raise InvalidData(f'Request body must contain JSON array or Object. Instead body contained {type(data)}')
+        Rows are read with `values_list()` in chunks rather than through the
+        model serializer, so memory use does not grow with the table size.
+        Accepts `?fields=` (defaults to every exportable field), the view's
+        usual filters and `?file_type=csv|xlsx`.
+        """
+        file_type = request.query_params.get('file_type', 'csv').lstrip('.').lower()
+        exportable_fields = self.get_export_fields()
+
+        requested = [name for name in request.query_params.get('fields', '').split(',') if name]
+        unknown_fields = [name for name in requested if name not in self.get_serializer().fields]
+        if unknown_fields:
+            raise InvalidData(f"Cannot export {', '.join(unknown_fields)}. Choose from {', '.join(exportable_fields)}.")
+
+        # Fields without a column of their own (computed values, many-to-many) are skipped.
+        field_names = [name for name in requested if name in exportable_fields] or list(exportable_fields)
+        header_row = [exportable_fields[name][1] for name in field_names]
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        rows = queryset.values_list(*[exportable_fields[name][0] for name in field_names]).iterator(chunk_size=self.export_chunk_size)
+        filename = f"{self.model.__name__.lower()}-export.{file_type}"
+
+        if file_type == 'csv':
+            return self.export_csv(header_row, rows, filename)
+
+        if file_type == 'xlsx':
+            return self.export_xlsx(header_row, rows, filename)
+
+        raise InvalidData(f"Unsupported export file type '{file_type}'. Choose from csv, xlsx.")
+
+    def get_export_fields(self):
+        """
+        Serializer fields backed by a concrete model column, mapped to their
+        (values() lookup, column header).
+        """
+        concrete_fields = {field.name for field in self.model._meta.concrete_fields}
+        serializer = self.get_serializer()
+
+        return {
+            name: (field.source, force_str(field.label or name))
+            for name, field in serializer.fields.items()
+            if not field.write_only and field.source in concrete_fields
+        }
+
+    @staticmethod
+    def get_export_value(value):
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        if value is None:
+            return ''
+        return value
+
+    def export_csv(self, header_row, rows, filename):
+
+        class Echo:
+            # Pseudo-buffer, csv.writer hands back each line as it is written.
+            def write(self, value):
+                return value
+
+        writer = csv.writer(Echo())
+
+        def stream():
+            yield writer.writerow(header_row)
+            for row in rows:
+                yield writer.writerow([self.get_export_value(value) for value in row])
+
+        response = StreamingHttpResponse(stream(), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def export_xlsx(self, header_row, rows, filename):
+        try:
+            import xlsxwriter
+        except ImportError:
+            raise InvalidData("XLSX exports require the 'XlsxWriter' package.")
+
+        # constant_memory flushes each row to disk as soon as it is written,
+        # and the finished workbook is streamed back from a temporary file.
+        output = tempfile.TemporaryFile()
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        worksheet = workbook.add_worksheet(f"{self.model.__name__}s"[:31])
+
+        worksheet.write_row(0, 0, header_row)
+        for row_number, row in enumerate(rows, start=1):
+            worksheet.write_row(row_number, 0, [self.get_export_value(value) for value in row])
+
+        workbook.close()
+        output.seek(0)
+
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=filename,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
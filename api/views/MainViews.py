@@ -7,6 +7,9 @@ from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.renderers import JSONRenderer
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.utils.encoding import force_str
 from django.contrib.auth.models import Permission, Group
 from django.contrib.admin.models import LogEntryManager, LogEntry
@@ -20,14 +23,19 @@ from ..serializers import PermissionSerializer
 from ..serializers import EventSerializer
 from ..serializers import LogEntrySerializer
 from ..serializers import ContentTypeSerializer
-from .BaseView import SERIALIZER_FIELD_LABEL_LOOKUP
+from .BaseView import OptionsMetadataMixin
+from .BaseView import CachedReadMixin
+from ..changes import ChangeFeed, EventStreamRenderer
+from ..exceptions import InvalidData
 #    __  __       _         _       _             __                     
 #   |  \/  | __ _(_)_ __   (_)_ __ | |_ ___ _ __ / _| __ _  ___ ___  ___ 
 #   | |\/| |/ _` | | '_ \  | | '_ \| __/ _ \ '__| |_ / _` |/ __/ _ \/ __|
 #   | |  | | (_| | | | | | | | | | | ||  __/ |  |  _| (_| | (_|  __/\__ \
 #   |_|  |_|\__,_|_|_| |_| |_|_| |_|\__\___|_|  |_|  \__,_|\___\___||___/
 #                                                                        
-class ContentTypeView(viewsets.GenericViewSet,
+class ContentTypeView(OptionsMetadataMixin,
+    CachedReadMixin,
+    viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     ):
@@ -37,6 +45,7 @@ class ContentTypeView(viewsets.GenericViewSet,
     model = ContentType
     queryset = model.objects.all()
     serializer_class = ContentTypeSerializer
+    cache_responses = True
 
     def __init__(self, *args, **kwargs):
         
@@ -44,93 +53,6 @@ class ContentTypeView(viewsets.GenericViewSet,
 
         super().__init__(*args, **kwargs)
 
-    serializer_field_label_lookup = SERIALIZER_FIELD_LABEL_LOOKUP
-
-    def retrieve(self, request, pk=None):
-        try:
-            _model_instance = self.get_queryset().get(id=pk)
-            serializer = self.get_serializer_class()(_model_instance)
-        
-        except self.model.DoesNotExist as e:
-            return Response({"error" : f"{self.model.__name__} with id:{pk} does not exist."}, status=status.HTTP_404_NOT_FOUND)
-        
-        else:
-            return Response(serializer.data, status=status.HTTP_200_OK)
-
-    def options(self, request, *args, **kwargs):
-        """
-        Don't include the view description in OPTIONS responses.
-        """
-        data = self.metadata_class().determine_metadata(request, self)
-        data['model'] = self.model.__name__.lower()
-        data['contenttype_id'] = ContentType.objects.get(model=data['model']).id
-        data['actions'] = None
-
-        _fields = self.model._meta.get_fields()
-        # If user has appropriate permissions for the view, include
-        # appropriate metadata about the fields that should be supplied.
-        serializer = self.get_serializer()
-        if hasattr(serializer, 'child'):
-            # If this is a `ListSerializer` then we want to examine the
-            # underlying child serializer instance instead.
-            serializer = serializer.child
-
-        data['model_fields'] = { 
-            field_name: self.get_field_info(field)
-            for field_name, field in serializer.fields.items()
-            if not isinstance(field, serializers.HiddenField)
-        }
-
-        for field in _fields:
-            if field.related_model and field.name in data['model_fields']:
-                data['model_fields'][field.name] = {**data['model_fields'][field.name], 'related_model_name': field.related_model.__name__.lower() }
-
-        return Response(data=data, status=status.HTTP_200_OK)
-    
-    def get_field_info(self, field):
-        """
-        Given an instance of a serializer field, return a dictionary
-        of metadata about it.
-        """
-        field_info = {
-            "type": self.serializer_field_label_lookup[field],
-            "required": getattr(field, "required", False),
-        }
-
-        attrs = [
-            'read_only', 'label', 'help_text',
-            'min_length', 'max_length',
-            'min_value', 'max_value',
-            'max_digits', 'decimal_places',
-        ]
-
-        for attr in attrs:
-            value = getattr(field, attr, None)
-            if value is not None and value != '':
-                field_info[attr] = force_str(value, strings_only=True)
-
-        if getattr(field, 'child', None):
-            field_info['child'] = self.get_field_info(field.child)
-
-        ## FIXME: I Removed this because it wasn't working and I didn't know what it did. Was causing issues with option requests to /api/assets.
-        # elif getattr(field, 'fields', None):
-        #     print(field)
-        #     print(getattr(field, 'fields', None))
-        #     field_info['children'] = self.get_serializer_info(field)
-
-        if (not field_info.get('read_only') and
-            not isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)) and
-                hasattr(field, 'choices')):
-            field_info['choices'] = [
-                {
-                    'value': choice_value,
-                    'display_name': force_str(choice_name, strings_only=True)
-                }
-                for choice_value, choice_name in field.choices.items()
-            ]
-
-        return field_info
-
 class UserView(BaseView):
     """
     Simple Viewset for Viewing User Information
@@ -138,6 +60,7 @@ class UserView(BaseView):
     model = User
     queryset = model.objects.all()
     serializer_class = UserSerializer
+    bulk_natural_keys = ['email']
 
     @action(detail=False, methods=["get"], url_name='current-user', url_path='current-user')
     def get_current_user(self, request):
@@ -156,6 +79,7 @@ class GroupView(BaseView):
     """
     model = Group
     queryset = model.objects.all()
+    cache_responses = True
     serializer_class = GroupSerializer
         
 class PermissionView(BaseView):
@@ -163,7 +87,10 @@ class PermissionView(BaseView):
     Simple Viewset for Viewing User Permissions
     """
     model = Permission
-    queryset = model.objects.all()
+    # The label of a permission names its content type.
+    queryset = model.objects.select_related('content_type')
+    response_dependencies = [ContentType]
+    cache_responses = True
     serializer_class = PermissionSerializer
         
 class EventView(BaseView):
@@ -219,3 +146,41 @@ class ObjectAdminLogEntries(APIView):
         payload =  LogEntrySerializer(queryset, many=True)
 
         return Response(payload.data)
+
+class ChangeFeedView(APIView):
+    """
+    Server-sent event stream of change notices (model, id, action,
+    last_modified) for the models the user may view.
+
+    Subscribe with `?model=asset,shipment` and/or `?object=shipment:4`;
+    without either, every viewable model is streamed. Resumes after the
+    `Last-Event-ID` header or `?since=` when given.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def get(self, request):
+
+        models = [name for name in request.query_params.get('model', '').split(',') if name]
+        objects = [
+            tuple(item.split(':', 1))
+            for item in request.query_params.get('object', '').split(',')
+            if ':' in item
+        ]
+
+        cursor = request.headers.get('Last-Event-ID', request.query_params.get('since'))
+        try:
+            cursor = int(cursor) if cursor is not None else None
+        except ValueError:
+            raise InvalidData("The change feed cursor must be an integer.")
+
+        feed = ChangeFeed.for_subscription(request.user, models=models, objects=objects, cursor=cursor)
+
+        # Async servers stream without holding a thread per client.
+        events = feed.aevents() if isinstance(request._request, ASGIRequest) else feed.events()
+
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+
+        return response
@@ -10,6 +10,7 @@ from .MainViews import GroupView
 from .MainViews import PermissionView
 from .MainViews import LogEntryView, ObjectAdminLogEntries
 from .MainViews import EventView
+from .MainViews import ChangeFeedView
 #       _                 _         _       _             __                     
 #      / \   ___ ___  ___| |_ ___  (_)_ __ | |_ ___ _ __ / _| __ _  ___ ___  ___ 
 #     / _ \ / __/ __|/ _ \ __/ __| | | '_ \| __/ _ \ '__| |_ / _` |/ __/ _ \/ __|
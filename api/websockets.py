@@ -0,0 +1,169 @@
+import json
+import re
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlparse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.http import parse_cookie
+from rest_framework.exceptions import APIException
+from assets.models import Shipment
+from .exceptions import InvalidData
+from .scan import get_scan_destination, get_scan_diff, scan_asset_codes
+
+class ScanSession:
+    """
+    ASGI websocket application for scanning assets into one shipment.
+
+    A client connects to `/ws/scan/<shipment_id>/` with its session cookie
+    and sends scans as JSON text frames:
+
+        {"ref": 1, "asset_code": "IPF001",
+         "destination_content_type": "shipment", "destination_object_id": 4}
+
+    `asset_codes` may be sent instead of `asset_code`, and the destination
+    defaults to the shipment itself. Each scan is answered with an `ack`
+    holding a result per code (see `api.scan.scan_asset_codes`) and, when
+    anything was accepted, a `diff` holding the scanned assets and the new
+    shipment asset counts (see `api.scan.get_scan_diff`). Failed scans are
+    answered with an `error`.
+    """
+    path_pattern = re.compile(r'^/ws/scan/(?P<shipment_id>\d+)/$')
+
+    # Close codes sent before the handshake is accepted.
+    CLOSE_NOT_FOUND = 4404
+    CLOSE_FORBIDDEN = 4403
+
+    async def __call__(self, scope, receive, send):
+
+        message = await receive()
+        if message['type'] != 'websocket.connect':
+            return
+
+        match = self.path_pattern.match(scope['path'])
+        if match is None:
+            await send({'type': 'websocket.close', 'code': self.CLOSE_NOT_FOUND})
+            return
+
+        shipment_id = int(match['shipment_id'])
+
+        if not self.origin_is_allowed(scope):
+            await send({'type': 'websocket.close', 'code': self.CLOSE_FORBIDDEN})
+            return
+
+        user = await sync_to_async(self.get_user)(scope)
+        if not user.has_perm("assets.scan_to_parent"):
+            await send({'type': 'websocket.close', 'code': self.CLOSE_FORBIDDEN})
+            return
+
+        session = await sync_to_async(self.open_session)(shipment_id)
+        if session is None:
+            await send({'type': 'websocket.close', 'code': self.CLOSE_NOT_FOUND})
+            return
+
+        await send({'type': 'websocket.accept'})
+        await self.send_json(send, session)
+
+        while True:
+            message = await receive()
+
+            if message['type'] == 'websocket.disconnect':
+                return
+
+            if message['type'] != 'websocket.receive':
+                continue
+
+            try:
+                payload = json.loads(message.get('text') or message.get('bytes') or '')
+                assert isinstance(payload, dict)
+            except (ValueError, AssertionError):
+                await self.send_json(send, {'type': 'error', 'ref': None, 'detail': InvalidData.default_detail})
+                continue
+
+            for reply in await sync_to_async(self.scan)(shipment_id, payload):
+                await self.send_json(send, reply)
+
+    async def send_json(self, send, data):
+        await send({'type': 'websocket.send', 'text': json.dumps(data, cls=DjangoJSONEncoder)})
+
+    def origin_is_allowed(self, scope):
+        """
+        Browsers send an Origin header with every websocket handshake; only
+        accept same-origin sessions so other sites can't reuse the cookie.
+        """
+        headers = dict(scope.get('headers', []))
+        origin = headers.get(b'origin')
+        if origin is None:
+            return True
+
+        return urlparse(origin.decode('latin1')).netloc == headers.get(b'host', b'').decode('latin1')
+
+    def get_user(self, scope):
+        """
+        Authenticate the handshake with the Django session cookie.
+        """
+        close_old_connections()
+
+        cookies = parse_cookie(dict(scope.get('headers', [])).get(b'cookie', b'').decode('latin1'))
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        session = session_store(cookies.get(settings.SESSION_COOKIE_NAME))
+
+        return get_user(SimpleNamespace(session=session))
+
+    def open_session(self, shipment_id):
+        close_old_connections()
+
+        try:
+            shipment = Shipment.objects.get(id=shipment_id)
+        except Shipment.DoesNotExist:
+            return None
+
+        return {'type': 'session', 'shipment': shipment.id, 'accepting_scans': shipment.can_accept_scan_entries()}
+
+    def scan(self, shipment_id, payload):
+        """
+        Perform one scan message and build the replies to it.
+        """
+        close_old_connections()
+        ref = payload.get('ref')
+
+        try:
+            if 'asset_codes' in payload:
+                asset_codes = payload['asset_codes']
+            elif 'asset_code' in payload:
+                asset_codes = [payload['asset_code']]
+            else:
+                raise InvalidData()
+
+            if not isinstance(asset_codes, list):
+                raise InvalidData()
+
+            shipment = Shipment.objects.get(id=shipment_id)
+            destination_object = get_scan_destination(
+                shipment,
+                payload.get('destination_content_type', 'shipment'),
+                payload.get('destination_object_id', shipment.id),
+            )
+
+            # Sessions are bound to their shipment.
+            if destination_object != shipment and getattr(destination_object, 'root_shipment_id', None) != shipment.id:
+                raise InvalidData(f"{destination_object} is not part of {shipment}.")
+
+            results, accepted, notices = scan_asset_codes(shipment, destination_object, asset_codes)
+
+        except Shipment.DoesNotExist:
+            return [{'type': 'error', 'ref': ref, 'detail': f"A shipment with id '{shipment_id}' does not exist."}]
+
+        except APIException as e:
+            return [{'type': 'error', 'ref': ref, 'detail': e.detail}]
+
+        replies = [{'type': 'ack', 'ref': ref, 'results': results}]
+
+        scanned_ids = {result['id'] for result in results if result['result'] == 'accepted'}
+        if scanned_ids:
+            replies.append({'type': 'diff', 'ref': ref, **get_scan_diff(shipment, scanned_ids, notices)})
+
+        return replies
@@ -1,9 +1,13 @@
 from django.db import models
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.core.validators import RegexValidator
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -22,6 +26,39 @@ class TrackedModel(models.Model):
     class Meta:
         abstract=True
 
+# Containment - Shipments hold containers which hold assets.
+MAX_CONTAINMENT_DEPTH = 2
+
+class AssetQuerySet(models.QuerySet):
+
+    def inside(self, container):
+        """
+        Every asset anywhere inside a shipment or container asset. The
+        lookup is a range scan over the indexed containment path.
+        """
+        prefix = container.containment_prefix()
+        return self.filter(path__gte=prefix, path__lt=prefix[:-1] + chr(ord("/") + 1))
+
+    def detach(self, location=None, **fields):
+        """
+        Take every asset out of its shipment or container with one UPDATE,
+        moving them to `location` when given. The assets end up at the top
+        level, so anything still inside them must be detached too. Returns
+        the number of assets updated.
+        """
+        if location is not None:
+            fields["location"] = location
+        fields.setdefault("last_modified", timezone.now())
+
+        return self.update(
+            parent_content_type=None,
+            parent_object_id=None,
+            root_shipment=None,
+            depth=0,
+            path="",
+            **fields,
+        )
+
 # Create your models here.
 class Asset(TrackedModel):
     CONDITION_OPTIONS = (
@@ -45,10 +82,16 @@ class Asset(TrackedModel):
     parent_object_id = models.PositiveIntegerField(blank=True, null=True)
     parent_object = GenericForeignKey('parent_content_type', 'parent_object_id')
     assets = GenericRelation(to="Asset", content_type_field="parent_content_type", object_id_field="parent_object_id")
+    # Denormalized containment, maintained by `save()` whenever the parent changes.
+    root_shipment = models.ForeignKey("Shipment", related_name="contained_assets", on_delete=models.SET_NULL, blank=True, null=True, editable=False)
+    depth = models.PositiveSmallIntegerField(_("Depth"), default=0, editable=False)
+    path = models.CharField(_("Path"), max_length=LARGE_TEXT_FIELD_SIZE, blank=True, default="", editable=False)
+
+    objects = AssetQuerySet.as_manager()
 
     class Meta:
         ordering = ["code"]
-        indexes  = [models.Index(fields=["code", "model"])]
+        indexes  = [models.Index(fields=["code", "model"]), models.Index(fields=["path"])]
         permissions = [
             ("scan_asset_to_parent", "Can move this asset via Scan API")
         ]
@@ -65,40 +108,88 @@ class Asset(TrackedModel):
         if not self.code.startswith(self.model.model_code):
             raise ValidationError("Asset Codes must start with their Model's model_code.")
 
-        parent_content_type = getattr(self.parent_content_type, "model", None)
-        
+        self.clean_parent(getattr(self.parent_content_type, "model", None), self.parent_object, self.pk)
+
+    @staticmethod
+    def clean_parent(parent_content_type, parent, pk=None):
+        """
+        Containment rules for placing the asset `pk` (None for a new asset)
+        into `parent`, whose content type model name is `parent_content_type`.
+        Also used to validate whole sheets against parents loaded in bulk.
+        """
+        # Verify the parent exists.
+        if parent_content_type is not None and parent is None:
+            raise ValidationError("The parent object does not exist.")
+
         # Verify any parent elements are containers or shipments.
         if parent_content_type == "asset":
             # Verify the Parent Asset is a container
-            if not self.parent_object.is_container:
+            if not parent.is_container:
                 raise ValidationError("Only container assets can contain other assets.")
         
         # Verify parent is valid (either a shipment or blank)
         elif parent_content_type != "shipment" and parent_content_type is not None:
                 raise ValidationError("Assets can only exist within shipments or container assets.")
         
-        # Enforce maximum recursion depth.
-        try:
-            if self.parent_object:
-                parent_level = self.parent_object.parent_object
-                if parent_level:
-                    grandparent_level = parent_level.parent_object
-                    if grandparent_level:
-                        raise ValidationError("Maximum recursion depth of 2 exceeded.")
-                    
-        except AttributeError:
-            pass # If we run into an attribute error before reaching grandparent_level then we are
-                 # good to go since the only attribute we're accessing is 'parent_object'.
+        # Enforce maximum recursion depth using the parent's stored containment.
+        if parent_content_type == "asset":
+            if pk is not None and f"asset:{pk}/" in parent.containment_prefix():
+                raise ValidationError("An asset cannot be placed inside itself.")
+
+            if parent.depth + 1 > MAX_CONTAINMENT_DEPTH:
+                raise ValidationError(f"Maximum recursion depth of {MAX_CONTAINMENT_DEPTH} exceeded.")
         
     def save(self, *args, **kwargs):
         # Call clean method to perform validation
         self.clean()
-        super().save(*args, **kwargs)
+
+        previous_prefix = self.containment_prefix() if self.pk is not None else None
+        previous_depth = self.depth
+        self.set_containment(self.parent_object)
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.update_descendant_containment(previous_prefix, previous_depth)
+
+    def containment_prefix(self):
+        """
+        Containment path shared by every asset inside this one.
+        """
+        return f"{self.path}asset:{self.pk}/"
+
+    def set_containment(self, parent):
+        """
+        Derive `root_shipment`, `depth` and `path` from a (new) parent object.
+        """
+        if parent is None:
+            self.root_shipment_id, self.depth, self.path = None, 0, ""
+        elif isinstance(parent, Shipment):
+            self.root_shipment_id, self.depth, self.path = parent.pk, 1, parent.containment_prefix()
+        else:
+            self.root_shipment_id, self.depth, self.path = parent.root_shipment_id, parent.depth + 1, parent.containment_prefix()
+
+    def update_descendant_containment(self, previous_prefix, previous_depth):
+        """
+        Move the containment of every descendant along with this asset using a
+        single UPDATE. Returns the number of descendants updated.
+        """
+        new_prefix = self.containment_prefix()
+        if previous_prefix is None or new_prefix == previous_prefix:
+            return 0
+
+        return Asset.objects.filter(
+            path__gte=previous_prefix, path__lt=previous_prefix[:-1] + chr(ord("/") + 1)
+        ).update(
+            path=Concat(Value(new_prefix), Substr("path", len(previous_prefix) + 1)),
+            depth=F("depth") + (self.depth - previous_depth),
+            root_shipment=self.root_shipment_id,
+            last_modified=timezone.now(),
+        )
     
     def can_accept_scan_entries(self):
         
         # Asset must exist within a shipment to be able to accept other assets as contents.
-        if not self.parent_content_type.model == 'shipment':
+        if self.parent_content_type is None or not self.parent_content_type.model == 'shipment':
             return False
         
         # The Shipment must also be accepting contents
@@ -181,6 +272,56 @@ class Shipment(TrackedModel):
             ("progress", "Can progress a shipment's status"),
         ]
     
+    def containment_prefix(self):
+        """
+        Containment path shared by every asset inside this shipment.
+        """
+        return f"shipment:{self.pk}/"
+
+    def build_packed_manifest(self):
+        """
+        Compact snapshot of this shipment's contents, read with one query. Each
+        entry holds an asset's id, code, model id and the id of the container
+        it is packed in (None when packed directly into the shipment). Parents
+        come before their contents.
+        """
+        return [
+            {
+                "id": asset["id"],
+                "code": asset["code"],
+                "model": asset["model_id"],
+                "parent": asset["parent_object_id"] if asset["depth"] > 1 else None,
+            }
+            for asset in Asset.objects.inside(self).order_by("depth", "id").values(
+                "id", "code", "model_id", "parent_object_id", "depth"
+            )
+        ]
+
+    @staticmethod
+    def is_packed_manifest(snapshot):
+        """
+        Whether a `packed_assets` value is a compact manifest rather than a
+        nested serializer snapshot taken by older versions.
+        """
+        return all("parent" in entry and "assets" not in entry for entry in snapshot)
+
+    @staticmethod
+    def compact_packed_assets(snapshot, parent=None):
+        """
+        Convert a nested serializer snapshot into a compact manifest.
+        """
+        if Shipment.is_packed_manifest(snapshot):
+            return snapshot
+
+        manifest = []
+        for entry in snapshot:
+            manifest.append({"id": entry["id"], "code": entry["code"], "model": entry["model"], "parent": parent})
+
+        for entry in snapshot:
+            manifest += Shipment.compact_packed_assets(entry.get("assets") or [], parent=entry["id"])
+
+        return manifest
+
     def can_accept_scan_entries(self):
         
         # Shipment must be in an initial status to accept contents.
@@ -1,3 +1,47 @@
-from django.test import TestCase
+import datetime
+from assets.models import Asset, Shipment
+from api.availability import get_model_availability
+from api.benchmarks import BENCHMARK_DATASET, BenchmarkTestCase
 
-# Create your tests here.
+class ContainmentBenchmarks(BenchmarkTestCase):
+    """
+    Containment and availability bookkeeping behind the asset endpoints.
+    """
+
+    def busiest_shipment(self):
+        return max(
+            Shipment.objects.filter(contained_assets__isnull=False).distinct(),
+            key=lambda shipment: Asset.objects.inside(shipment).count(),
+        )
+
+    def test_move_crate(self):
+        crate_id = Asset.objects.filter(is_container=True, assets__isnull=False, root_shipment__isnull=False).order_by('id').first().id
+        destination = Shipment.objects.filter(status=0).order_by('-id').first()
+
+        def move_crate():
+            crate = Asset.objects.get(id=crate_id)
+            crate.parent_object = destination
+            crate.save()
+
+        self.benchmark('asset-move-crate', move_crate)
+        self.assertFalse(Asset.objects.get(id=crate_id).assets.exclude(root_shipment=destination).exists())
+
+    def test_build_packed_manifest(self):
+        shipment = self.busiest_shipment()
+        manifest = self.benchmark('shipment-build-packed-manifest', shipment.build_packed_manifest)
+        self.assertEqual(len(manifest), Asset.objects.inside(shipment).count())
+
+    def test_detach_shipment_contents(self):
+        shipment = self.busiest_shipment()
+        self.benchmark(
+            'asset-detach-shipment-contents',
+            lambda: Asset.objects.inside(shipment).detach(location=shipment.destination_id),
+        )
+        self.assertFalse(Asset.objects.inside(shipment).exists())
+
+    def test_model_availability(self):
+        start_date = BENCHMARK_DATASET['today'] - datetime.timedelta(days=365)
+        self.benchmark(
+            'model-availability-two-years',
+            lambda: get_model_availability(start_date, start_date + datetime.timedelta(days=730)),
+        )
@@ -0,0 +1,51 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+class ChunkedUpdateCommand(BaseCommand):
+    """
+    Base for maintenance commands that rewrite many rows. Rows are updated in
+    primary key order, one chunk per transaction, so the database is never
+    write locked for longer than a single chunk takes.
+    """
+    default_batch_size = 2000
+    location_help = "Only act on shipments bound for the location with this id. Can be repeated."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report how many rows would change without writing anything.")
+        parser.add_argument("--batch-size", type=int, default=self.default_batch_size, help="Rows to update per transaction.")
+        parser.add_argument("--shipment", type=int, action="append", default=[], help="Only act on the shipment with this id. Can be repeated.")
+        parser.add_argument("--location", type=int, action="append", default=[], help=self.location_help)
+
+    def update_in_chunks(self, queryset, update, noun, dry_run=False, batch_size=None):
+        """
+        Call `update` with the rows of `queryset`, a chunk at a time, and
+        return the total it reports. Rows an update moves out of `queryset`
+        are not revisited, since chunks follow the primary key.
+        """
+        batch_size = batch_size or self.default_batch_size
+        started = time.monotonic()
+        total = queryset.count()
+
+        if dry_run:
+            self.stdout.write(f"Would update {total} {noun}.")
+            return total
+
+        updated = 0
+        last_pk = None
+        while True:
+            chunk = queryset.order_by("pk")
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+
+            pks = list(chunk.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+
+            with transaction.atomic():
+                updated += update(queryset.filter(pk__in=pks))
+
+            last_pk = pks[-1]
+            self.stdout.write(f"Updated {updated}/{total} {noun} ({time.monotonic() - started:.1f}s)")
+
+        return updated
@@ -1,32 +1,44 @@
-from django.core.management.base import BaseCommand, CommandError
-from django.core.management.color import no_style
+import time
+from django.core.management.base import CommandError
+from django.db.models import Q
+from django.utils import timezone
 from assets.models import Shipment
+from api.cache import bump_generation
+from ._chunked import ChunkedUpdateCommand
 
-class Command(BaseCommand):
+class Command(ChunkedUpdateCommand):
     help = "Set 'packed_assets' value of all shipments to default value."
+    location_help = "Only act on shipments to or from the location with this id. Can be repeated."
 
     def handle(self, *args, **options):
-        
-        shipments = Shipment.objects.all()
-        shipments_modified = 0
+        started = time.monotonic()
 
-        try:
-            for shipment in shipments:
-                
-                packed_assets_default_value = Shipment._meta.get_field("packed_assets").default()
-
-                if (shipment.packed_assets == packed_assets_default_value):
-                    continue # The current shipment is already set to the default value
+        packed_assets_default_value = Shipment._meta.get_field("packed_assets").default()
 
-                else:
-                    shipment.packed_assets = packed_assets_default_value # Restore default
-                    shipment.save()
-                    shipments_modified += 1 # Increment modified shipment counter
+        # Shipments already set to the default value are left alone.
+        shipments = Shipment.objects.exclude(packed_assets=packed_assets_default_value)
+        if options["shipment"]:
+            shipments = shipments.filter(id__in=options["shipment"])
+        if options["location"]:
+            shipments = shipments.filter(Q(destination__in=options["location"]) | Q(origin__in=options["location"]))
 
+        try:
+            shipments_modified = self.update_in_chunks(
+                shipments,
+                lambda chunk: chunk.update(packed_assets=packed_assets_default_value, last_modified=timezone.now()),
+                "shipments",
+                dry_run=options["dry_run"],
+                batch_size=options["batch_size"],
+            )
         except Exception as e:
             raise CommandError(e)
-        
+
+        if options["dry_run"]:
+            return
+
+        if shipments_modified:
+            bump_generation(Shipment)
 
         self.stdout.write(
-            self.style.SUCCESS(f"Successfully reset {shipments_modified} shipment's packed_assets to default")
-        )
\ No newline at end of file
+            self.style.SUCCESS(f"Successfully reset {shipments_modified} shipment's packed_assets to default in {time.monotonic() - started:.1f}s")
+        )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from assets.models import Shipment
+from api.cache import bump_generation
+
+class Command(BaseCommand):
+    help = "Rewrite nested 'packed_assets' snapshots of shipments as compact manifests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Shipments to rewrite per query.")
+
+    def handle(self, *args, **options):
+
+        batch_size = options["batch_size"]
+        shipments = Shipment.objects.exclude(packed_assets=[]).only("id", "packed_assets").order_by("id")
+        shipments_modified = 0
+
+        try:
+            with transaction.atomic():
+                batch = []
+                for shipment in shipments.iterator(chunk_size=batch_size):
+
+                    if Shipment.is_packed_manifest(shipment.packed_assets):
+                        continue # Already compact
+
+                    shipment.packed_assets = Shipment.compact_packed_assets(shipment.packed_assets)
+                    batch.append(shipment)
+
+                    if len(batch) >= batch_size:
+                        Shipment.objects.bulk_update(batch, ["packed_assets"])
+                        shipments_modified += len(batch)
+                        batch = []
+
+                if batch:
+                    Shipment.objects.bulk_update(batch, ["packed_assets"])
+                    shipments_modified += len(batch)
+
+                if shipments_modified:
+                    bump_generation(Shipment)
+
+        except Exception as e:
+            raise CommandError(e)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully compacted packed_assets of {shipments_modified} shipments")
+        )
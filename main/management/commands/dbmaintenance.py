@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from api.changes import CHANGE_NOTICE_RETENTION
+from api.models import ChangeNotice
+
+class Command(BaseCommand):
+    help = (
+        "Routine SQLite upkeep, meant to run on a schedule (e.g. nightly from cron): prune expired change notices, "
+        "refresh the query planner statistics with ANALYZE and PRAGMA optimize, and checkpoint the WAL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database alias to maintain.")
+        parser.add_argument("--vacuum", action="store_true", help="Also VACUUM the database. This locks it for the duration.")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor != "sqlite":
+            raise CommandError(f"dbmaintenance only supports SQLite, not {connection.vendor}.")
+
+        pruned, _ = ChangeNotice.objects.using(connection.alias).filter(
+            time__lt=timezone.now() - CHANGE_NOTICE_RETENTION
+        ).delete()
+        self.stdout.write(f"Pruned {pruned} change notices.")
+
+        statements = ["ANALYZE", "PRAGMA optimize", "PRAGMA wal_checkpoint(TRUNCATE)"]
+        if options["vacuum"]:
+            statements.append("VACUUM")
+
+        with connection.cursor() as cursor:
+            for statement in statements:
+                started = time.monotonic()
+                cursor.execute(statement)
+                cursor.fetchall()
+                self.stdout.write(f"{statement} ({time.monotonic() - started:.1f}s)")
+
+        self.stdout.write(self.style.SUCCESS(f"Successfully maintained the '{connection.alias}' database"))
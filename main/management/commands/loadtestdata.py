@@ -1,84 +1,357 @@
+import datetime
+import json
+import random
+import time
+from django.contrib.admin.models import LogEntry, ADDITION, CHANGE
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand, CommandError
-from assets.models import Asset, AssetModel, AssetIcon, Shipment, Location
+from django.db import transaction
+from django.utils import timezone
+from assets.models import Asset, Model, AssetIcon, Shipment, Location, Reservation, ReservationItem
+from api.cache import bump_generation
+
+ICONS = [
+    {"name":"Container", "source_name":"Inventory"},
+    {"name":"Router", "source_name":"Router"},
+    {"name":"Iphone", "source_name":"PhoneIphone"},
+    {"name":"Android Phone", "source_name":"PhoneAndroid"},
+    {"name":"Charging Station", "source_name":"ChargingStation"},
+    {"name":"Chromebook", "source_name":"LaptopChromebook"},
+    {"name":"Windows Laptop", "source_name":"LaptopWindows"},
+    {"name":"Mac", "source_name":"LaptopMac"},
+    {"name":"Printer", "source_name":"Print"},
+]
+
+MODELS = [
+    {"name":"Mobile Device Crate", "manufacturer":"Pelican", "model_code":"MDC", "icon":"Container"},
+    {"name":"Zebra Printer Crate", "manufacturer":"Pelican", "model_code":"ZPC", "icon":"Container"},
+    {"name":"Iphone 12 Pro Max", "manufacturer":"Apple", "model_code":"IPF", "icon":"Iphone"},
+    {"name":"Samsung Galaxy S24", "manufacturer":"Samsung", "model_code":"SGS", "icon":"Android Phone"},
+    {"name":"10 Port Charging Station", "manufacturer":"Anker", "model_code":"ATP", "icon":"Charging Station"},
+    {"name":"Chromebook", "manufacturer":"Google", "model_code":"CHB", "icon":"Chromebook"},
+    {"name":"Windows Laptop", "manufacturer":"Microsoft", "model_code":"WIN", "icon":"Windows Laptop"},
+    {"name":"Mac", "manufacturer":"Apple", "model_code":"MAC", "icon":"Mac"},
+    {"name":"ZC10L Badge Printer", "manufacturer":"Zebra", "model_code":"ZCT", "icon":"Printer"},
+]
+
+# Crate model code -> (share of crates, model codes it holds).
+CRATES = {
+    "MDC": (0.8, ["IPF", "SGS", "CHB", "WIN", "MAC"]),
+    "ZPC": (0.2, ["ZCT", "ATP"]),
+}
+CRATE_CAPACITY = 10
+
+CITIES = ["Austin", "Boston", "Chicago", "Denver", "Las Vegas", "Miami", "Nashville", "Orlando", "Phoenix", "Seattle"]
+CARRIERS = ["UPS", "FedEx", "DHL", "USPS", "Freight"]
 
 class Command(BaseCommand):
-    help = "Populates database with test data."
+    help = "Populates database with a seeded, synthetic dataset for load testing and benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--assets", type=int, default=2000, help="Assets to create, about a tenth of them crates.")
+        parser.add_argument("--shipments", type=int, default=100, help="Shipments to create, as outbound and return pairs.")
+        parser.add_argument("--reservations", type=int, default=200, help="Equipment holds to create.")
+        parser.add_argument("--locations", type=int, default=20, help="Locations to create, about a fifth of them warehouses.")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed; the same seed and --today build the same dataset.")
+        parser.add_argument(
+            "--today", type=datetime.date.fromisoformat, default=None,
+            help="Date (YYYY-MM-DD) that shipment and reservation dates and statuses are built around. Defaults to today.",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows per INSERT.")
 
     def handle(self, *args, **options):
+        if options["seed"] < 0:
+            raise CommandError("--seed must not be negative.")
 
-        ## Create Asset Icons
-        icon_details = [
-            {"name":"Container", "source_name":"Inventory"},
-            {"name":"Router", "source_name":"Router"},
-            {"name":"Iphone", "source_name":"PhoneIphone"},
-            {"name":"Android Phone", "source_name":"PhoneAndroid"},
-            {"name":"Charging Station", "source_name":"ChargingStation"},
-            {"name":"Chromebook", "source_name":"LaptopChromebook"},
-            {"name":"Windows Laptop", "source_name":"LaptopWindows"},
-            {"name":"Mac", "source_name":"LaptopMac"},
-            {"name":"Printer", "source_name":"Print"},
-        ]
+        self.seed = options["seed"]
+        self.rng = random.Random(self.seed)
+        self.batch_size = options["batch_size"]
+        self.today = options["today"] or timezone.localdate()
+        self.log_entries = []
 
-        for icon in icon_details:
-            try:
-                a = AssetIcon.objects.get_or_create(**icon)[0]
-                self.stdout.write(
-                    self.style.SUCCESS(f"Created Asset Icon Object '{a}'")
-                )
-            except Exception as e:
-                self.stderr.write(
-                    self.style.ERROR(e)
-                )
-                return None
-
-        ## Create Asset Models
-        model_details = [
-            {"name":"Mobile Device Crate", "description":"", "manufacturer":"Pelican", "model_code":"MDC", "icon": AssetIcon.objects.get(name="Container")},
-            {"name":"Zebra Printer Crate", "description":"", "manufacturer":"Pelican", "model_code":"ZPC", "icon": AssetIcon.objects.get(name="Container")},
-            {"name":"Iphone 12 Pro Max", "description":"", "manufacturer":"Apple", "model_code":"IPF", "icon": AssetIcon.objects.get(name="Iphone")},
-            {"name":"Samsung Galaxy S24", "description":"", "manufacturer":"Samsung", "model_code":"SGS", "icon": AssetIcon.objects.get(name="Android Phone")},
-            {"name":"10 Port Charging Station", "description":"", "manufacturer":"Anker", "model_code":"ATP", "icon": AssetIcon.objects.get(name="Charging Station")},
-            {"name":"Chromebook", "description":"", "manufacturer":"Google", "model_code":"CHB", "icon": AssetIcon.objects.get(name="Chromebook")},
-            {"name":"Windows Laptop", "description":"", "manufacturer":"Microsoft", "model_code":"WIN", "icon": AssetIcon.objects.get(name="Windows Laptop")},
-            {"name":"Mac", "description":"", "manufacturer":"Apple", "model_code":"MAC", "icon": AssetIcon.objects.get(name="Mac")},
-            {"name":"ZC10L Badge Printer", "description":"", "manufacturer":"Zebra", "model_code":"ZCT", "icon": AssetIcon.objects.get(name="Printer")},
-        ]
-        
-        for model in model_details:
-            try:
-                m = AssetModel.objects.get_or_create(**model)[0]
-                self.stdout.write(
-                    self.style.SUCCESS(f"Created Asset Model Object '{m}'")
-                )
-            except Exception as e:
-                self.stderr.write(
-                    self.style.ERROR(e)
-                )
-                return None
-
-        ## Create Assets
-        asset_details = [
-            {"code":"MDC001", "model":AssetModel.objects.get(model_code="MDC"), "is_container":True},
-            {"code":"IPF001", "model":AssetModel.objects.get(model_code="IPF"), "is_container":False},
-            {"code":"IPF002", "model":AssetModel.objects.get(model_code="IPF"), "is_container":False},
-            {"code":"IPF003", "model":AssetModel.objects.get(model_code="IPF"), "is_container":False},
-            {"code":"IPF004", "model":AssetModel.objects.get(model_code="IPF"), "is_container":False},
-            {"code":"ZPC001", "model":AssetModel.objects.get(model_code="ZPC"), "is_container":True},
-            {"code":"ZCT001", "model":AssetModel.objects.get(model_code="ZCT"), "is_container":False}
+        started = time.monotonic()
+
+        try:
+            with transaction.atomic():
+                self.user = self.get_user()
+                self.models = self.create_catalogue()
+                warehouses, venues = self.stage("locations", self.create_locations, max(options["locations"], 2))
+                shipments = self.stage("shipments", self.create_shipments, options["shipments"], warehouses, venues)
+                self.stage("assets", self.create_assets, options["assets"], warehouses, shipments)
+                self.stage("reservations", self.create_reservations, options["reservations"], shipments)
+                self.flush_log_entries()
+
+                bump_generation(Asset, Model, AssetIcon, Shipment, Location, Reservation, ReservationItem, LogEntry)
+
+        except Exception as e:
+            raise CommandError(e)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"complete in {time.monotonic() - started:.1f}s")
+        )
+
+    def stage(self, noun, create, *args):
+        started = time.monotonic()
+        result = create(*args)
+        self.stdout.write(f"Created {noun} ({time.monotonic() - started:.1f}s)")
+        return result
+
+    def get_user(self):
+        """
+        Audit entries are attributed to the first superuser, or to a
+        dedicated user when there is none.
+        """
+        User = get_user_model()
+        user = User.objects.filter(is_superuser=True).order_by("pk").first()
+        if user is None:
+            user, _ = User.objects.get_or_create(
+                email="loadtestdata@example.com",
+                defaults={"first_name": "Load", "last_name": "Test"},
+            )
+        return user
+
+    def create_catalogue(self):
+        icons = {icon["name"]: AssetIcon.objects.get_or_create(**icon)[0] for icon in ICONS}
+
+        models = {}
+        for details in MODELS:
+            models[details["model_code"]] = Model.objects.get_or_create(
+                model_code=details["model_code"],
+                defaults={
+                    "name": details["name"],
+                    "description": "",
+                    "manufacturer": details["manufacturer"],
+                    "icon": icons[details["icon"]],
+                },
+            )[0]
+        return models
+
+    def log(self, instance, action_flag=ADDITION, fields=None):
+        """
+        Queue an audit entry dated some time in the past year. Entries are
+        written a batch at a time.
+        """
+        self.log_entries.append(
+            LogEntry(
+                action_time=timezone.now() - datetime.timedelta(minutes=self.rng.randint(0, 60 * 24 * 365)),
+                user_id=self.user.id,
+                content_type_id=ContentType.objects.get_for_model(instance.__class__).id,
+                object_id=str(instance.pk),
+                object_repr=str(instance)[:200],
+                action_flag=action_flag,
+                change_message=json.dumps([{"added": {}}] if action_flag == ADDITION else [{"changed": {"fields": fields}}]),
+            )
+        )
+        if len(self.log_entries) >= self.batch_size:
+            self.flush_log_entries()
+
+    def create_locations(self, count):
+        """
+        About one in five locations is a warehouse; the rest are venues.
+        """
+        warehouse_count = max(1, count // 5)
+        locations = [
+            Location(
+                name=f"Warehouse {i + 1:03}" if i < warehouse_count else f"Venue {i - warehouse_count + 1:03}",
+                address_line_1=f"{self.rng.randint(1, 9999)} Main St",
+                city=self.rng.choice(CITIES),
+                country="US",
+                zipcode=f"{self.rng.randint(10000, 99999)}",
+                is_warehouse=i < warehouse_count,
+            )
+            for i in range(count)
         ]
+        Location.objects.bulk_create(locations, batch_size=self.batch_size)
 
-        for asset in asset_details:
-            try:
-                a = Asset.objects.get_or_create(**asset)
-                self.stdout.write(
-                    self.style.SUCCESS(f"Created Asset Object '{a}'")
-                )
-            except Exception as e:
-                self.stderr.write(
-                    self.style.ERROR(e)
+        for location in locations:
+            self.log(location)
+
+        return locations[:warehouse_count], locations[warehouse_count:]
+
+    def create_shipments(self, count, warehouses, venues):
+        """
+        Shipments come in pairs: an outbound shipment from a warehouse to a
+        venue, and its return shipment back. Dates fall within a year either
+        side of today and statuses follow them.
+        """
+        pairs = []
+        for _ in range(count // 2 + count % 2):
+            warehouse, venue = self.rng.choice(warehouses), self.rng.choice(venues)
+            departure = self.today + datetime.timedelta(days=self.rng.randint(-365, 365))
+            arrival = departure + datetime.timedelta(days=self.rng.randint(1, 5))
+            returned = arrival + datetime.timedelta(days=self.rng.randint(2, 10))
+            pairs.append((
+                self.build_shipment(warehouse, venue, departure, arrival),
+                self.build_shipment(venue, warehouse, returned, returned + datetime.timedelta(days=self.rng.randint(1, 5))),
+            ))
+
+        if count % 2:
+            # An odd count leaves the last outbound shipment without a return.
+            pairs[-1] = (pairs[-1][0], None)
+
+        return_shipments = [returned for _, returned in pairs if returned is not None]
+        Shipment.objects.bulk_create(return_shipments, batch_size=self.batch_size)
+
+        outbound_shipments = []
+        for outbound, returned in pairs:
+            outbound.return_shipment = returned
+            outbound_shipments.append(outbound)
+        Shipment.objects.bulk_create(outbound_shipments, batch_size=self.batch_size)
+
+        shipments = outbound_shipments + return_shipments
+        for shipment in shipments:
+            self.log(shipment)
+            if shipment.status > 0:
+                self.log(shipment, CHANGE, ["status"])
+
+        return shipments
+
+    def build_shipment(self, origin, destination, departure, arrival):
+        if arrival < self.today:
+            status = 4 if self.rng.random() < 0.05 else 3
+        elif departure <= self.today:
+            status = 2
+        else:
+            status = self.rng.choice([0, 0, 1])
+
+        return Shipment(
+            origin=origin,
+            destination=destination,
+            carrier=self.rng.choice(CARRIERS),
+            status=status,
+            departure_date=datetime.datetime.combine(departure, datetime.time(9), tzinfo=datetime.timezone.utc),
+            arrival_date=datetime.datetime.combine(arrival, datetime.time(17), tzinfo=datetime.timezone.utc),
+        )
+
+    def create_assets(self, count, warehouses, shipments):
+        """
+        A tenth of the assets are crates, half of which are packed into open
+        shipments. Most devices sit in crates that hold their kind of model,
+        a few are packed straight into shipments and the rest are loose at
+        warehouses. Packed and in transit shipments get manifests of their
+        contents.
+        """
+        open_shipments = [shipment for shipment in shipments if shipment.status in (0, 1, 2)]
+        shipment_content_type = ContentType.objects.get_for_model(Shipment)
+        asset_content_type = ContentType.objects.get_for_model(Asset)
+        # Codes depend only on the seed, so datasets of different seeds can
+        # share a database but one seed can only be loaded once.
+        next_code = 1
+
+        def build_asset(model, parent=None, location=None):
+            nonlocal next_code
+            asset = Asset(
+                code=f"{model.model_code}{self.seed:04}{next_code:07}",
+                model=model,
+                serial_number=f"SN{self.rng.getrandbits(40):012X}",
+                condition=0 if self.rng.random() < 0.9 else self.rng.choice([1, 2, 3]),
+                is_container=model.model_code in CRATES,
+                location=location,
+            )
+            next_code += 1
+
+            if isinstance(parent, Shipment):
+                asset.parent_content_type, asset.parent_object_id = shipment_content_type, parent.pk
+                asset.set_containment(parent)
+                asset.location = parent.origin
+            elif parent is not None:
+                asset.parent_content_type, asset.parent_object_id = asset_content_type, parent.pk
+                asset.set_containment(parent)
+                asset.location = parent.location
+
+            return asset
+
+        ## Crates
+        crates = []
+        for _ in range(count // 10):
+            model_code = "MDC" if self.rng.random() < CRATES["MDC"][0] else "ZPC"
+            if open_shipments and self.rng.random() < 0.5:
+                crates.append(build_asset(self.models[model_code], parent=self.rng.choice(open_shipments)))
+            else:
+                crates.append(build_asset(self.models[model_code], location=self.rng.choice(warehouses)))
+        Asset.objects.bulk_create(crates, batch_size=self.batch_size)
+        for crate in crates:
+            self.log(crate)
+
+        ## Devices
+        slots = [crate for crate in crates for _ in range(self.rng.randint(CRATE_CAPACITY // 2, CRATE_CAPACITY))]
+        self.rng.shuffle(slots)
+        device_codes = [code for _, codes in CRATES.values() for code in codes]
+
+        devices = []
+        for _ in range(count - len(crates)):
+            placement = self.rng.random()
+            if slots and placement < 0.7:
+                crate = slots.pop()
+                model = self.models[self.rng.choice(CRATES[crate.model.model_code][1])]
+                devices.append(build_asset(model, parent=crate))
+            elif open_shipments and placement < 0.75:
+                devices.append(build_asset(self.models[self.rng.choice(device_codes)], parent=self.rng.choice(open_shipments)))
+            else:
+                devices.append(build_asset(self.models[self.rng.choice(device_codes)], location=self.rng.choice(warehouses)))
+
+            if len(devices) >= self.batch_size:
+                self.save_devices(devices)
+                devices = []
+        self.save_devices(devices)
+
+        ## Packed manifests
+        manifests = {shipment.pk: [] for shipment in open_shipments if shipment.status > 0}
+        for asset in Asset.objects.filter(root_shipment__in=manifests).order_by("depth", "id").values("id", "code", "model_id", "parent_object_id", "depth", "root_shipment_id"):
+            manifests[asset["root_shipment_id"]].append({
+                "id": asset["id"],
+                "code": asset["code"],
+                "model": asset["model_id"],
+                "parent": asset["parent_object_id"] if asset["depth"] > 1 else None,
+            })
+
+        packed = [shipment for shipment in open_shipments if shipment.pk in manifests]
+        for shipment in packed:
+            shipment.packed_assets = manifests[shipment.pk]
+        Shipment.objects.bulk_update(packed, ["packed_assets"], batch_size=self.batch_size)
+
+    def save_devices(self, devices):
+        Asset.objects.bulk_create(devices, batch_size=self.batch_size)
+
+        for asset in devices:
+            self.log(asset)
+            if asset.parent_object_id is not None:
+                self.log(asset, CHANGE, ["parent_content_type", "parent_object_id"])
+
+    def create_reservations(self, count, shipments):
+        """
+        Holds of one to two weeks over the same two years as the shipments,
+        each for a few device models. A third are tied to an outbound
+        shipment.
+        """
+        outbound_shipments = [shipment for shipment in shipments if shipment.return_shipment_id is not None]
+        device_models = [self.models[code] for _, codes in CRATES.values() for code in codes]
+
+        for offset in range(0, count, self.batch_size):
+            reservations = []
+            for i in range(offset, min(count, offset + self.batch_size)):
+                start_date = self.today + datetime.timedelta(days=self.rng.randint(-365, 365))
+                reservations.append(
+                    Reservation(
+                        title=f"Hold {i + 1}",
+                        start_date=start_date,
+                        end_date=start_date + datetime.timedelta(days=self.rng.randint(1, 14)),
+                        shipment=self.rng.choice(outbound_shipments) if outbound_shipments and self.rng.random() < 0.33 else None,
+                    )
                 )
-                return None
+            Reservation.objects.bulk_create(reservations, batch_size=self.batch_size)
 
-        self.stdout.write(
-            self.style.SUCCESS('complete')
-        )
\ No newline at end of file
+            items = [
+                ReservationItem(reservation=reservation, model=model, quantity=self.rng.randint(1, 25))
+                for reservation in reservations
+                for model in self.rng.sample(device_models, self.rng.randint(1, 5))
+            ]
+            ReservationItem.objects.bulk_create(items, batch_size=self.batch_size)
+
+            for reservation in reservations:
+                self.log(reservation)
+
+    def flush_log_entries(self):
+        LogEntry.objects.bulk_create(self.log_entries, batch_size=self.batch_size)
+        self.log_entries = []
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import CharField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Concat
+from assets.models import Asset, Shipment, MAX_CONTAINMENT_DEPTH
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized containment columns (root_shipment, depth, path) of every asset."
+
+    def handle(self, *args, **options):
+
+        asset_content_type = ContentType.objects.get_for_model(Asset)
+        shipment_content_type = ContentType.objects.get_for_model(Shipment)
+        parent = Asset.objects.filter(pk=OuterRef("parent_object_id"))
+
+        try:
+            with transaction.atomic():
+                # Assets outside of any shipment or container.
+                Asset.objects.exclude(
+                    parent_content_type__in=[asset_content_type, shipment_content_type]
+                ).update(root_shipment=None, depth=0, path="")
+
+                # Assets packed directly into a shipment.
+                Asset.objects.filter(parent_content_type=shipment_content_type).update(
+                    root_shipment=F("parent_object_id"),
+                    depth=1,
+                    path=Concat(Value("shipment:"), Cast("parent_object_id", CharField()), Value("/")),
+                )
+
+                # Assets inside containers, one pass per nesting level.
+                for _ in range(MAX_CONTAINMENT_DEPTH + 1):
+                    Asset.objects.filter(parent_content_type=asset_content_type).update(
+                        root_shipment=Subquery(parent.values("root_shipment")[:1]),
+                        depth=Subquery(parent.values("depth")[:1]) + 1,
+                        path=Concat(
+                            Subquery(parent.values("path")[:1]),
+                            Value("asset:"),
+                            Cast("parent_object_id", CharField()),
+                            Value("/"),
+                        ),
+                    )
+
+        except Exception as e:
+            raise CommandError(e)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully rebuilt containment of {Asset.objects.count()} assets")
+        )
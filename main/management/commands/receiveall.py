@@ -1,46 +1,47 @@
-from django.core.management.base import BaseCommand, CommandError
-from django.core.management.color import no_style
-from assets.models import Asset, AssetModel, AssetIcon, Shipment, Location
+import time
+from django.core.management.base import CommandError
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from assets.models import Asset, Shipment
+from api.cache import bump_generation
+from ._chunked import ChunkedUpdateCommand
 
-class Command(BaseCommand):
-    help = "Receive all assets"
+class Command(ChunkedUpdateCommand):
+    help = "Receive all assets: take every asset out of its shipment or container and move assets in shipments to the shipment's destination."
 
     def handle(self, *args, **options):
-        assetsReceived = 0
-        
-        containers = Asset.objects.filter(is_container=True)
+        started = time.monotonic()
 
-        try:
-            for container in containers:
-                if getattr(container, "parent_object", None) is not None:
-
-                    container.parent_object = None
-                    container.save()
-                    self.stdout.write(
-                        no_style().SUCCESS(f"Received Asset '{container}'")
-                    )
-                    assetsReceived+=1
+        assets = Asset.objects.filter(parent_content_type__isnull=False)
+        if options["shipment"]:
+            assets = assets.filter(root_shipment__in=options["shipment"])
+        if options["location"]:
+            assets = assets.filter(root_shipment__destination__in=options["location"])
 
-
-        except Exception as e:
-            raise CommandError(e)
-        
-        items = Asset.objects.filter(is_container=False)
+        # Evaluated per row against the values from before the update, so
+        # `root_shipment` still names the shipment being received.
+        destination = Coalesce(
+            Subquery(Shipment.objects.filter(pk=OuterRef("root_shipment")).values("destination")[:1]),
+            F("location"),
+        )
 
         try:
-            for item in items:
-                if getattr(item, "parent_object", None) is not None:
-                    item.parent_object = None
-                    item.save()
-                    self.stdout.write(
-                        no_style().SUCCESS(f"Received Asset '{item}'")
-                    )
-                    assetsReceived+=1
-
+            assets_received = self.update_in_chunks(
+                assets,
+                lambda chunk: chunk.detach(location=destination),
+                "assets",
+                dry_run=options["dry_run"],
+                batch_size=options["batch_size"],
+            )
         except Exception as e:
             raise CommandError(e)
 
+        if options["dry_run"]:
+            return
+
+        if assets_received:
+            bump_generation(Asset)
 
         self.stdout.write(
-            self.style.SUCCESS(f"Successfully received {assetsReceived} assets")
-        )
\ No newline at end of file
+            self.style.SUCCESS(f"Successfully received {assets_received} assets in {time.monotonic() - started:.1f}s")
+        )
@@ -9,7 +9,7 @@ import {
   Legend,
 } from "chart.js";
 import { Box, useTheme } from "@mui/material";
-import { useInfiniteQuery, useQueries } from "@tanstack/react-query";
+import { useInfiniteQuery, useQuery } from "@tanstack/react-query";
 import { backendApiContext } from "../context";
 
 // Register required chart.js modules
@@ -77,27 +77,21 @@ const AvailableEquipmentChart = (props) => {
 
     const allModelsAreLoaded = models.isFetched && models.isSuccess && !models.hasNextPage;
     const allModels = models.data?.pages.map(p => p.results).flat();
-    const modelAssetQueries = useQueries({
-        queries: allModelsAreLoaded ? 
-        allModels.map( model => {
-            return({
-                queryKey: ['asset', 'by-model', model.id],
-                queryFn: async () => {
-
-                    const formattedUrl = new URL(`${backend.api.baseUrl}/asset/`);
-                
-                    formattedUrl.searchParams.set('model', model.id);
-                    formattedUrl.searchParams.set('location__is_warehouse', true)
-
-                    const res = await fetch(formattedUrl);
-                    const data = await res.json();
-
-                    return data;
-
-                  }
-            })
-        })
-        : [],
+    const warehouseCounts = useQuery({
+        queryKey: ['asset', 'counts', 'in-warehouse'],
+        queryFn: async () => {
+
+            const formattedUrl = new URL(`${backend.api.baseUrl}/asset/counts/`);
+
+            formattedUrl.searchParams.set('group_by', 'model');
+            formattedUrl.searchParams.set('location__is_warehouse', true)
+
+            const res = await fetch(formattedUrl);
+            const data = await res.json();
+
+            return data;
+
+          }
     });
 
     // Effect: Ensure all models are loaded (not just first page)
@@ -108,13 +102,14 @@ const AvailableEquipmentChart = (props) => {
     },[models.isFetching])
     // Effect: Update chart state to include equipment counts
     useEffect(() => {
-        if (allModelsAreLoaded && modelAssetQueries.map(Q => Q.isSuccess).every(Q => Q)){
-            const counts = modelAssetQueries.map( Q => Q.data?.results.length);
+        if (allModelsAreLoaded && warehouseCounts.isSuccess){
+            const countsByModel = Object.fromEntries(warehouseCounts.data.results.map(row => [row.model, row.count]));
+            const counts = allModels.map(model => countsByModel[model.id] ?? 0);
             const backgroundColors = [...counts].map(c => theme.palette.primary.light);
 
             dispatchEquipmentAvailable({type: 'addDataset', value: {label:'In warehouse', data:counts, backgroundColor:backgroundColors, borderColor:backgroundColors}})
         }
-    }, [...modelAssetQueries.map(Q => Q.isSuccess)])
+    }, [allModelsAreLoaded, warehouseCounts.isSuccess])
     // Effect: Update chart state to include labels
     useEffect(() => {
         if(allModelsAreLoaded && equipmentAvailableChart.data.labels.length == 0){
@@ -394,6 +394,7 @@ const ContentAssetsList = props => {
         queryFn: async () => {
             const formattedUrl = new URL(`${backend.api.baseUrl}/shipment/`);
             formattedUrl.searchParams.set('return_shipment', obj.id);
+            formattedUrl.searchParams.set('expand', 'packed_assets.detail');
 
             const res = await fetch(formattedUrl);
             const data = await res.json();
@@ -440,6 +441,24 @@ const ContentAssetsList = props => {
         }
     })
 
+    const receiveShipment = useMutation({
+        mutationFn: () => {
+
+            const receiveUrl = new URL(`${backend.api.baseUrl}/shipment/${obj.id}/receive/`);
+            const requestHeaders = backend.api.getRequestHeaders(receiveUrl);
+
+            return fetch(receiveUrl, {
+                method: 'POST',
+                headers: requestHeaders,
+            });
+
+        },
+        onSettled: (data, error, variables, context) => {
+            queryClient.invalidateQueries({queryKey : ['shipment']});
+            queryClient.invalidateQueries({queryKey : [ASSETMODELNAME]});
+        }
+    })
+
     // Effects
     useEffect(() => { // Sync objData state value with objQuery results
 
@@ -676,6 +695,7 @@ const ContentAssetsList = props => {
             title={<Box textTransform="capitalize">{objContentType} Contents ({objData.asset_counts?.total_assets})</Box>}
             actions={[
                 hasAssetSelections && canReceiveAssetsFromObj ? <Button startIcon={<Archive/>} variant="outlined" onClick={receiveSelectedAssets}>Receive selected</Button> : null,
+                objContentType == 'shipment' && canReceiveAssetsFromObj && objData.asset_counts?.total_assets > 0 ? <Button startIcon={<Archive/>} variant="outlined" onClick={() => receiveShipment.mutate()} disabled={receiveShipment.isLoading}>Receive all</Button> : null,
                 hasAssetSelections && canRemoveAssetsFromObj ? <Button startIcon={<Delete/>} variant="outlined" onClick={removeSelectedAssets}>Remove selected</Button> : null,
             ]}
 
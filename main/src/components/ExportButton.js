@@ -1,8 +1,7 @@
 import { Download } from '@mui/icons-material';
 import { Autocomplete, Box, Button, Checkbox, FormControlLabel, FormGroup, Grid, TextField, Typography, useTheme } from '@mui/material';
-import { useInfiniteQuery } from '@tanstack/react-query';
-import React, { useCallback, useEffect, useReducer, useState } from 'react';
-import * as XLSX from 'xlsx';
+import React, { useCallback, useContext, useEffect, useReducer, useState } from 'react';
+import { backendApiContext } from '../context';
 import { useModelOptions } from '../customHooks';
 import ActionButton from './ActionButton';
 import CustomDialog from './CustomDialog';
@@ -10,7 +9,6 @@ import CustomDialog from './CustomDialog';
 // Constant Variables
 const VALIDEXPORTFILETYPES = [
     '.xlsx',
-    '.xls',
     '.csv'
 ]
 
@@ -60,6 +58,7 @@ function ExportButton(props) {
     const { model } = props;
 
     const theme = useTheme();
+    const backend = useContext(backendApiContext);
     const modelOptions = useModelOptions(model);
 
     const [dialogIsOpen, setDialogIsOpen] = useState(false);
@@ -68,11 +67,6 @@ function ExportButton(props) {
     const [userRequestedDownload, setUserRequestedDownload] = useState(false);
     const [isPreparingDownload, setIsPreparingDownload] = useState(false);
 
-    // Queries
-    const allModelObjects = useInfiniteQuery({
-        queryKey : [model],
-    })
-
     // Effects
     useEffect(() => {
         if(modelOptions.data != undefined && exportFields.length < 1){
@@ -94,58 +88,26 @@ function ExportButton(props) {
 
     useEffect(() => {
 
-        if (allModelObjects.isFetching){
-            // Escape Hatch
-            return;
-        }
-
-        if(!allModelObjects.hasNextPage){
-            // Escape Hatch
-            return;
-        }
-
-        allModelObjects.fetchNextPage();
-
-    }, [allModelObjects.hasNextPage, allModelObjects.isFetching]);
-
-    useEffect(() => {
-
-        if( userRequestedDownload && !allModelObjects.hasNextPage){
+        if( userRequestedDownload ){
             setIsPreparingDownload(true);
 
             const selectedExportFields = Object.entries(exportFields)
             .filter(([fieldName, fieldDetails]) => fieldDetails.selected == true)
+            .map(([fieldName, _]) => fieldName)
 
-            const headerRow = selectedExportFields.map(([_,fieldDetails]) => fieldDetails.label)
+            // The export is generated and streamed by the backend.
+            const exportUrl = new URL(`${backend.api.baseUrl}/${model}/export/`);
+            exportUrl.searchParams.set('fields', selectedExportFields.join(','));
+            exportUrl.searchParams.set('file_type', exportFileType.replace('.', ''));
 
-            const modelObjectsData = allModelObjects.data.pages.map(page => page.results).flat();
-            
-            let sheetArrays = [
-                headerRow
-            ]
-
-            modelObjectsData.forEach( modelObj => {
-                let objRow = []
-
-                selectedExportFields.forEach(([fieldName, _]) => {
-                    objRow.push(modelObj[fieldName])
-                })
-
-                sheetArrays.push(objRow);
-
-            })
-
-            const ws = XLSX.utils.aoa_to_sheet(sheetArrays);
-            const wb = XLSX.utils.book_new(ws, `${model}s`);
-            
-            XLSX.writeFile(wb, `${model}-export${exportFileType}`)
+            window.location.assign(exportUrl);
 
             setIsPreparingDownload(false);
             onDialogClose();
 
         }
 
-    }, [userRequestedDownload, allModelObjects.hasNextPage]);
+    }, [userRequestedDownload]);
 
     const openDialog = e => {
         setDialogIsOpen(true);
@@ -31,14 +31,14 @@ function ImportButton(props) {
 
     // Mutations
     const api = useMutation({
-        mutationFn: async ( data ) => {
-            const updateUrl = new URL(`${backend.api.baseUrl}/${model}/${data.id ? data.id + "/" : ""}`);
+        mutationFn: async ( rows ) => {
+            const updateUrl = new URL(`${backend.api.baseUrl}/${model}/bulk/`);
             const requestHeaders = backend.api.getRequestHeaders();
           
             return fetch(updateUrl, {
-              method: data.hasOwnProperty('id') ? 'PUT' : 'POST',
+              method: 'POST',
               headers: requestHeaders,
-              body: JSON.stringify(data),
+              body: JSON.stringify(rows),
             });
         },
         onSettled: (res, error, vars) => {
@@ -148,13 +148,15 @@ function ImportButton(props) {
 
             if (!res.ok){
                 const data = await res.json();
-                if (data.hasOwnProperty('errors')){
-                    const fieldErrors = Object.entries(data['errors'])
-                    .map( ([fieldName, errors]) => `${fieldName}: ${errors.join(', ')}`);
-    
-                    const errorMessage = `Row ${data['row']}: ${fieldErrors}`;
-    
-                    uploadErrors.push(errorMessage);
+                if (data.hasOwnProperty('results')){
+                    data['results'].forEach( rowResult => {
+                        const fieldErrors = Object.entries(rowResult['errors'])
+                        .map( ([fieldName, errors]) => `${fieldName}: ${errors.join(', ')}`);
+        
+                        const errorMessage = `Row ${rowResult['row']}: ${fieldErrors}`;
+        
+                        uploadErrors.push(errorMessage);
+                    })
                 }
             }
 
@@ -243,9 +245,7 @@ function ImportButton(props) {
 
     const saveObjectsToBackend = e => {
 
-        payloadData.forEach( objRow => {
-            api.mutate(objRow);
-        })
+        api.mutate(payloadData);
 
         onDialogClose();
     }
@@ -78,6 +78,21 @@ const ReserveTool = props => {
     // Queries
     const models = useInfiniteQuery({ queryKey: ['model'] });
 
+    const requiresDateSelection = reservations.endDate == null || reservations.startDate == null;
+    const availability = useQuery({
+        queryKey: [MODELNAME, 'availability', reservations.startDate, reservations.endDate],
+        enabled: !requiresDateSelection,
+        queryFn: async () => {
+
+            const availabilityUrl = new URL(`${backend.api.baseUrl}/${MODELNAME}/availability/`);
+            availabilityUrl.searchParams.set('start_date', FORMATDATE(reservations.startDate));
+            availabilityUrl.searchParams.set('end_date', FORMATDATE(reservations.endDate));
+
+            const res = await fetch(availabilityUrl);
+            return await res.json();
+        }
+    });
+
     // Mutations
     const pushReservations = useMutation({
         mutationFn: (reservation) => {
@@ -141,18 +156,26 @@ const ReserveTool = props => {
 
     }, [pushReservations, reservations]);
 
+    // Formatted Data
+    const availableQuantities = Object.fromEntries(
+        (availability.data?.models ?? []).map( m => [m.model, m.min_available] )
+    ); // Lowest available quantity of each model over the selected dates
+
     const updateModelQty = useCallback((modelId, quantity) => {
+        const available = availableQuantities[modelId] ?? 0;
+
         if ( quantity < 0){
             dispatchReservations({ type: 'setQuantity', modelId, quantity:0 });
         }
+        else if ( availability.isSuccess && quantity > available ){
+            dispatchReservations({ type: 'setQuantity', modelId, quantity: Math.max(available, 0) });
+        }
         else{
             dispatchReservations({ type: 'setQuantity', modelId, quantity });
         }
-    }, [dispatchReservations]);
+    }, [dispatchReservations, availability.isSuccess, availableQuantities]);
 
-    // Formatted Data
     const allLoadedModels = models.data?.pages.map(p => p.results).flat();
-    const requiresDateSelection = reservations.endDate == null || reservations.startDate == null;
     const reservationsIsModified = JSON.stringify(reservations) != JSON.stringify(DEFAULTRESERVATIONSTATE);
     const reservationsHaveNonZeroQty = Object.entries(reservations.quantities).map(([_, qty]) => qty > 0).includes(true);
     const reservationsHasRequiredData = (reservations.startDate != null && reservations.endDate != null) && reservationsHaveNonZeroQty;
@@ -231,6 +254,7 @@ const ReserveTool = props => {
                                             model={m}
                                             onChange={qty => { updateModelQty(m.id, qty) }}
                                             value={value}
+                                            available={availability.isSuccess ? (availableQuantities[m.id] ?? 0) : undefined}
                                         />
                                     )
 
@@ -253,7 +277,7 @@ const ReserveTool = props => {
 const EquipmentSelectionRow = props => {
 
     // Props Destructuring
-    const { model, value, onChange } = props;
+    const { model, value, onChange, available } = props;
   
     const modelIcon = useQuery({ queryKey: ['asseticon', model.icon] });
   
@@ -268,6 +292,7 @@ const EquipmentSelectionRow = props => {
             <Typography fontSize="0.85rem" sx={{opacity:"80%"}}>{model.manufacturer}</Typography>
             <Typography fontSize="1.15rem" fontWeight="bold">{model.label}</Typography>
             {model.isContainer ? <Typography variant="code">Container</Typography> : null}
+            {available != undefined ? <Typography fontSize="0.85rem" color={available > 0 ? "text.secondary" : "error"}>{Math.max(available, 0)} available</Typography> : null}
           </Box>
   
         </Box>
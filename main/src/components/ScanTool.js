@@ -7,6 +7,72 @@ import { backendApiContext, notificationContext } from "../context";
 import CustomDialog from "./CustomDialog";
 import { ModelAutoComplete } from "./ModelAutoComplete";
 import ScanLog from "./ScanLog";
+import { markChangesApplied } from "../queryConfig";
+
+// Helper Functions
+export const applyScanDiff = (data, diff) => {
+    // Patch a cached shipment with a scan session diff. Other cached data is returned as-is.
+    if (data == undefined || data.id != diff.shipment || !Array.isArray(data.assets)){
+        return data;
+    }
+
+    const scannedIds = new Set(diff.assets.map(({asset}) => asset.id));
+    const withoutScanned = assets => assets
+        .filter( asset => !scannedIds.has(asset.id) )
+        .map( asset => Array.isArray(asset.assets) ? {...asset, assets: withoutScanned(asset.assets)} : asset );
+
+    // Remove scanned assets from their previous position, then add them under their new parent.
+    let assets = withoutScanned(data.assets);
+    diff.assets.forEach( ({parent, asset}) => {
+        if (parent == null){
+            assets = [...assets, asset];
+            return;
+        }
+        assets = assets.map( container => container.id == parent ? {...container, assets: [...(container.assets ?? []), asset]} : container );
+    });
+
+    return {...data, assets, asset_counts: diff.asset_counts};
+}
+
+// Custom Hooks
+const useScanSession = (shipmentId, onMessage) => {
+    // Websocket scan session bound to one shipment; see api/websockets.py.
+
+    const socket = useRef(null);
+    const messageHandler = useRef(onMessage);
+    const [ isOpen, setIsOpen ] = useState(false);
+
+    messageHandler.current = onMessage;
+
+    useEffect(() => {
+
+        if (shipmentId == undefined || !("WebSocket" in window)){
+            return;
+        }
+
+        const sessionUrl = new URL(`/ws/scan/${shipmentId}/`, window.location.href);
+        sessionUrl.protocol = sessionUrl.protocol == "https:" ? "wss:" : "ws:";
+
+        const ws = new WebSocket(sessionUrl);
+        ws.onopen = () => setIsOpen(true);
+        ws.onclose = () => setIsOpen(false);
+        ws.onmessage = e => messageHandler.current(JSON.parse(e.data));
+        socket.current = ws;
+
+        return () => {
+            ws.close();
+            socket.current = null;
+            setIsOpen(false);
+        }
+
+    }, [shipmentId])
+
+    const send = useCallback( data => {
+        socket.current.send(JSON.stringify(data));
+    }, [])
+
+    return { isOpen, send };
+}
 
 // Primary Component
 const ScanTool = props => {
@@ -19,7 +85,7 @@ const ScanTool = props => {
         elevation = 1,
         visible = true,
         variant = "block",
-        onSuccessfulScan = () => {}
+        onSuccessfulScan = () => {} // Only called for scans sent over http; scan sessions patch the query cache instead.
     } = props;
     
     // Hooks
@@ -37,6 +103,55 @@ const ScanTool = props => {
     const [ inputData, setInputData ] = useState(""); // The code to be entered
     const [ scanLog, setScanLog ] = useState({}); // Log of Scans Sent to Backend
     const [ displayScanUi, setDisplayScanUi ] = useState(false); // Whether or not to show the scan dialog.
+    const pendingScans = useRef({}); // Asset codes of scans sent over the scan session, by ref
+    const nextScanRef = useRef(1);
+
+    // Scan Session
+    const handleSessionMessage = useCallback(message => {
+
+        const submittedAssetCode = pendingScans.current[message.ref];
+
+        switch (message.type){
+
+            case 'ack':
+                // Accepted scans are logged when their diff arrives.
+                message.results
+                .filter( result => result.result != 'accepted' )
+                .forEach( result => {
+                    setScanLog(prev => ({...prev, [result.asset_code]: {data:null, error:result.detail}}));
+                });
+
+                if (message.results.every( result => result.result != 'accepted' )){
+                    delete pendingScans.current[message.ref];
+                }
+                return;
+
+            case 'diff':
+                message.assets.forEach( ({asset}) => {
+                    setScanLog(prev => ({...prev, [asset.code]: {data:asset, error:undefined}}));
+
+                    // Update Scan Destination
+                    if (asset.is_container && asset.code == submittedAssetCode){
+                        setDestination(asset);
+                        setDestinationContentType('asset');
+                    }
+                });
+                queryClient.setQueriesData({queryKey:['shipment']}, data => applyScanDiff(data, message));
+                markChangesApplied(message.changes);
+                delete pendingScans.current[message.ref];
+                return;
+
+            case 'error':
+                if (submittedAssetCode != undefined){
+                    setScanLog(prev => ({...prev, [submittedAssetCode]: {data:null, error:message.detail}}));
+                }
+                delete pendingScans.current[message.ref];
+                return;
+        }
+
+    }, [queryClient])
+
+    const scanSession = useScanSession(shipment?.id, handleSessionMessage);
 
     // Mutations
     const scanAssetMutation = useMutation({
@@ -44,6 +159,14 @@ const ScanTool = props => {
 
             const { method , payload } = vars;
 
+            // Prefer the open scan session; replies arrive through handleSessionMessage.
+            if (scanSession.isOpen){
+                const ref = nextScanRef.current++;
+                pendingScans.current[ref] = payload.asset_code;
+                scanSession.send({ref, ...payload});
+                return null;
+            }
+
             // Scanning logic is handled primarily by the backend, we will just pass back the shipment id and asset code.
             const scanUrl = new URL(`${backend.api.baseUrl}/scan/`);
             const requestHeaders = backend.api.getRequestHeaders();
@@ -68,6 +191,12 @@ const ScanTool = props => {
 
             if(error){
                 notifications.add({message: new String(error), severity: "error"})
+                return;
+            }
+
+            // Sent over the scan session
+            if (data == null){
+                return;
             }
             
             // Backend has returned a http 200 response status
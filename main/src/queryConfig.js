@@ -1,4 +1,4 @@
-import React from "react";
+import React, { useEffect } from "react";
 import { QueryClient, QueryClientProvider } from "@tanstack/react-query";
 import { getCookie } from "./context";
 
@@ -70,9 +70,68 @@ export const queryClient = new QueryClient({
   },
 });
 
+// Change Feed
+// Invalidates exactly the cached entries the backend reports as changed, so
+// window focus doesn't need to refetch everything while the feed is connected.
+const appliedChanges = new Set(); // Change ids already applied to the cache, e.g. by scan session diffs
+
+export const markChangesApplied = changeIds => {
+  changeIds.forEach( id => appliedChanges.add(String(id)) );
+};
+
+const isDetailQueryKey = queryKey => queryKey.length == 2 && /^\d+$/.test(String(queryKey[1]));
+
+const invalidateChangedQueries = change => {
+  queryClient.invalidateQueries({
+    predicate: ({ queryKey }) => {
+      if (queryKey[0] != change.model){
+        return false;
+      }
+      // Detail queries of other objects are unaffected; lists may include the object.
+      return isDetailQueryKey(queryKey) ? String(queryKey[1]) == String(change.id) : true;
+    }
+  });
+};
+
+const setRefetchOnWindowFocus = value => {
+  const defaultOptions = queryClient.getDefaultOptions();
+  queryClient.setDefaultOptions({
+    ...defaultOptions,
+    queries: {...defaultOptions.queries, refetchOnWindowFocus: value}
+  });
+};
+
+const useChangeFeed = () => {
+
+  useEffect(() => {
+
+    if (!("EventSource" in window)){
+      return;
+    }
+
+    const feed = new EventSource(`${window.location.protocol}${window.location.host}/api/changes/`);
+    feed.onopen = () => setRefetchOnWindowFocus(false);
+    feed.onerror = () => setRefetchOnWindowFocus(true);
+    feed.addEventListener('change', e => {
+      if (appliedChanges.delete(e.lastEventId)){
+        return;
+      }
+      invalidateChangedQueries(JSON.parse(e.data));
+    });
+
+    return () => {
+      feed.close();
+      setRefetchOnWindowFocus(true);
+    }
+
+  }, []);
+};
+
 // Query Client Provider
 const CustomQueryClientProvider = ({children}) => {
 
+    useChangeFeed();
+
     return(
         <QueryClientProvider client={queryClient}>
             {children}
@@ -1,3 +1,89 @@
-from django.test import TestCase
+from io import StringIO
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from assets.models import Asset, Shipment
+from api.benchmarks import BENCHMARK_DATASET, BenchmarkTestCase
 
-# Create your tests here.
+class MainApiBenchmarks(BenchmarkTestCase):
+    """
+    User, permission and audit endpoints.
+    """
+
+    def test_current_user(self):
+        self.benchmark('current-user', lambda: self.get('/api/current-user/'))
+
+    def test_user_list(self):
+        self.benchmark('user-list', lambda: self.get('/api/user/'))
+
+    def test_group_list(self):
+        self.benchmark('group-list', lambda: self.get('/api/group/'))
+
+    def test_permission_list(self):
+        response = self.benchmark('permission-list', lambda: self.get('/api/permission/'))
+        self.assertEqual(response.json()['count'], Permission.objects.count())
+
+    def test_permission_list_keyset_page(self):
+        response = self.benchmark('permission-list-keyset-page', lambda: self.get('/api/permission/?cursor=&page_size=20'))
+        self.assertEqual(len(response.json()['results']), 20)
+        self.assertIsNotNone(response.json()['next'])
+
+    def test_contenttype_list(self):
+        self.benchmark('contenttype-list', lambda: self.get('/api/contenttype/'))
+
+    def test_event_list(self):
+        self.benchmark('event-list', lambda: self.get('/api/event/'))
+
+    def test_logentry_list(self):
+        self.benchmark('logentry-list', lambda: self.get('/api/logentry/'))
+
+    def test_object_log_entries(self):
+        asset = Asset.objects.filter(root_shipment__isnull=False).order_by('id').first()
+        content_type = ContentType.objects.get_for_model(Asset)
+        self.benchmark('object-log-entries', lambda: self.get(f'/api/logs/{content_type.id}/{asset.id}/'))
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'main-tests'}})
+class KeysetPaginationTests(TestCase):
+    """
+    Keyset pages of a model whose ordering spans a relation.
+    """
+
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(
+            email='keyset@example.com', password='keyset', first_name='Key', last_name='Set'
+        )
+        self.client.force_login(user)
+
+    def test_permission_pages(self):
+        url = '/api/permission/?cursor=&page_size=5'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content[:500])
+            seen += [permission['id'] for permission in response.json()['results']]
+            url = response.json()['next']
+
+        self.assertEqual(seen, list(Permission.objects.values_list('id', flat=True)))
+
+class CommandBenchmarks(BenchmarkTestCase):
+    """
+    Maintenance commands over the whole dataset.
+    """
+
+    def test_receiveall(self):
+        self.benchmark('command-receiveall', lambda: call_command('receiveall', stdout=StringIO()))
+        self.assertFalse(Asset.objects.filter(parent_content_type__isnull=False).exists())
+
+    def test_clearallpackedassets(self):
+        self.benchmark('command-clearallpackedassets', lambda: call_command('clearallpackedassets', stdout=StringIO()))
+        self.assertFalse(Shipment.objects.exclude(packed_assets=[]).exists())
+
+    def test_rebuildassetpaths(self):
+        self.benchmark('command-rebuildassetpaths', lambda: call_command('rebuildassetpaths', stdout=StringIO()))
+
+    def test_loadtestdata(self):
+        self.benchmark('command-loadtestdata', lambda: call_command('loadtestdata', assets=1000, shipments=20, reservations=100, locations=10, seed=2, today=BENCHMARK_DATASET['today'], stdout=StringIO()))
+        self.assertTrue(LogEntry.objects.exists())